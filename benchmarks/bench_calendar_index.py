@@ -0,0 +1,101 @@
+"""
+Microbenchmark of the per-row cost of labelling aggregation buckets, comparing the
+direct khayyam conversion against the precomputed calendar index.
+
+Usage:
+    python benchmarks/bench_calendar_index.py [--rows N] [--repeat R]
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "zibal.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from khayyam import JalaliDate  # noqa: E402
+
+from transactions.helpers import (  # noqa: E402
+    format_group_id_to_date_key,
+    get_start_date,
+)
+
+
+def format_group_id_to_date_key_khayyam(group_id, mode):
+    # The conversion every row went through before the calendar index
+    if mode == "daily":
+        date = datetime.datetime(group_id["year"], group_id["month"], group_id["day"])
+        return JalaliDate(date).strftime("%Y/%m/%d")
+    elif mode == "weekly":
+        date = datetime.datetime.strptime(
+            f'{group_id["isoYear"]}-W{group_id["isoWeek"]}-1', "%G-W%V-%u"
+        )
+        jalali_date = JalaliDate(date)
+        week_number = int(jalali_date.strftime("%W"))
+        return f"{jalali_date.year} هفته {week_number} سال"
+    date = datetime.datetime(group_id["year"], group_id["month"], 1)
+    jalali_date = JalaliDate(date)
+    return f"{jalali_date.year} {jalali_date.strftime('%B')}"
+
+
+def get_start_date_strptime(group_id, mode):
+    if mode == "daily":
+        return datetime.datetime(group_id["year"], group_id["month"], group_id["day"])
+    elif mode == "weekly":
+        return datetime.datetime.strptime(
+            f'{group_id["isoYear"]}-W{group_id["isoWeek"]}-1', "%G-W%V-%u"
+        )
+    return datetime.datetime(group_id["year"], group_id["month"], 1)
+
+
+def build_group_ids(mode, rows):
+    group_ids = []
+    date = datetime.date(2020, 1, 1)
+    for _ in range(rows):
+        if mode == "daily":
+            group_ids.append({"year": date.year, "month": date.month, "day": date.day})
+        elif mode == "weekly":
+            iso_year, iso_week, _ = date.isocalendar()
+            group_ids.append({"isoYear": iso_year, "isoWeek": iso_week})
+        else:
+            group_ids.append({"year": date.year, "month": date.month})
+        date += datetime.timedelta(days=1)
+    return group_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'before (us/row)':>16} {'after (us/row)':>16} {'speedup':>8}")
+    for mode in ["daily", "weekly", "monthly"]:
+        group_ids = build_group_ids(mode, args.rows)
+
+        def before():
+            for group_id in group_ids:
+                format_group_id_to_date_key_khayyam(group_id, mode)
+                get_start_date_strptime(group_id, mode)
+
+        def after():
+            for group_id in group_ids:
+                format_group_id_to_date_key(group_id, mode)
+                get_start_date(group_id, mode)
+
+        before_time = min(timeit.repeat(before, number=1, repeat=args.repeat))
+        after_time = min(timeit.repeat(after, number=1, repeat=args.repeat))
+        print(
+            f"{mode:<8} {before_time / args.rows * 1e6:>16.2f} "
+            f"{after_time / args.rows * 1e6:>16.2f} {before_time / after_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
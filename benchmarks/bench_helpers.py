@@ -0,0 +1,172 @@
+"""
+Microbenchmarks of the helpers and serializers on the request path of the stats
+endpoints, timed without a database.
+
+Usage:
+    python benchmarks/bench_helpers.py [--rows N] [--repeat R] [--output FILE]
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "zibal.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from bson import ObjectId  # noqa: E402
+from results import save_results  # noqa: E402
+
+from transactions.helpers import (  # noqa: E402
+    build_jalali_boundaries,
+    construct_history_pipeline,
+    format_group_id_to_date_key,
+    get_period_start,
+    merge_live_tail,
+    parse_stats_query_params,
+)
+from transactions.models import TransactionSummary  # noqa: E402
+from transactions.serializers import transaction_encoder  # noqa: E402
+
+
+def build_group_ids(rows):
+    first = datetime.datetime(2023, 1, 1)
+    dates = [first + datetime.timedelta(days=index) for index in range(rows)]
+    return {
+        "daily": [
+            {"year": date.year, "month": date.month, "day": date.day} for date in dates
+        ],
+        "weekly": [
+            {"isoYear": date.isocalendar()[0], "isoWeek": date.isocalendar()[1]}
+            for date in dates
+        ],
+        "monthly": [{"year": date.year, "month": date.month} for date in dates],
+    }
+
+
+def build_cases(rows):
+    group_ids = build_group_ids(rows)
+    moments = [
+        datetime.datetime(2023, 1, 1) + datetime.timedelta(hours=7 * index)
+        for index in range(rows)
+    ]
+    response_rows = [
+        {
+            "key": f"1402/01/{index % 30 + 1:02d}",
+            "value": Decimal(index * 1234567) / 100,
+        }
+        for index in range(rows)
+    ]
+    summary_rows = [
+        {"key": format_group_id_to_date_key(group_id, "daily"), "amount": index * 1.5}
+        for index, group_id in enumerate(group_ids["daily"])
+    ]
+    live_results = [
+        {"_id": group_id, "total_amount": 1000.0, "total_count": 2}
+        for group_id in group_ids["daily"][-30:]
+    ]
+    merchant_ids = [ObjectId() for _ in range(100)]
+    mapping = {
+        merchant_id: response_rows[: rows // len(merchant_ids)]
+        for merchant_id in merchant_ids
+    }
+    query_params = {
+        "type": "amount",
+        "mode": "daily",
+        "merchantId": str(merchant_ids[0]),
+        "from": "2023-01-01",
+        "to": "2023-12-31",
+        "limit": "100",
+        "calendar": "jalali",
+    }
+    params = parse_stats_query_params(query_params, calendars=("gregorian", "jalali"))
+
+    # Every case maps to its callable and the number of units it processes, so the
+    # per row cases report the time of a single row
+    cases = {
+        "parse_stats_query_params": (
+            lambda: parse_stats_query_params(
+                query_params, calendars=("gregorian", "jalali")
+            ),
+            1,
+        ),
+        "construct_history_pipeline": (
+            lambda: construct_history_pipeline(
+                "daily", {"merchantId": merchant_ids[0]}, 100
+            ),
+            1,
+        ),
+        "build_jalali_boundaries (1 year daily)": (
+            lambda: build_jalali_boundaries("daily", params["start"], params["end"]),
+            1,
+        ),
+        "get_period_start (per row)": (
+            lambda: [get_period_start(moment, "weekly") for moment in moments],
+            rows,
+        ),
+        "merge_live_tail": (
+            lambda: merge_live_tail(
+                [dict(row) for row in response_rows[-30:]],
+                live_results,
+                {"stat_type": "amount", "mode": "daily"},
+            ),
+            1,
+        ),
+        "TransactionSummary.get_stat_value (per row)": (
+            lambda: [
+                TransactionSummary.get_stat_value("amount", row["amount"])
+                for row in summary_rows
+            ],
+            rows,
+        ),
+        "transaction_encoder.encode (per row)": (
+            lambda: transaction_encoder.encode(response_rows),
+            rows,
+        ),
+        "transaction_encoder.iter_encode (per row)": (
+            lambda: b"".join(transaction_encoder.iter_encode(response_rows)),
+            rows,
+        ),
+        "transaction_encoder.encode_mapping (per row)": (
+            lambda: transaction_encoder.encode_mapping(mapping),
+            rows // len(merchant_ids) * len(merchant_ids),
+        ),
+    }
+    for mode in ["daily", "weekly", "monthly"]:
+        cases[f"format_group_id_to_date_key {mode} (per row)"] = (
+            lambda mode=mode: [
+                format_group_id_to_date_key(group_id, mode)
+                for group_id in group_ids[mode]
+            ],
+            rows,
+        )
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<48} {'us/unit':>12}")
+    for name, (run, units) in build_cases(args.rows).items():
+        number, _ = timeit.Timer(run).autorange()
+        elapsed = min(timeit.repeat(run, number=number, repeat=args.repeat)) / number
+        results[name] = {"us_per_unit": elapsed / units * 1e6, "units": units}
+        print(f"{name:<48} {elapsed / units * 1e6:>12.3f}")
+
+    if args.output:
+        save_results(args.output, "helpers", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of encoding large stats payloads, comparing the DRF serializer and JSON
+renderer against the row encoder with each available JSON backend.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows N] [--repeat R]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "zibal.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework import serializers  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from transactions.serializers import RowEncoder  # noqa: E402
+from transactions.serializers.row_encoder import orjson  # noqa: E402
+
+
+class TransactionSerializer(serializers.Serializer):
+    """
+    The DRF serializer the stats endpoints used before the row encoder.
+    """
+
+    key = serializers.CharField()
+    value = serializers.IntegerField()
+
+
+def build_rows(rows):
+    return [
+        {
+            "key": f"{1400 + index // 365:04d}/{index // 30 % 12 + 1:02d}/{index % 30 + 1:02d}",
+            "value": Decimal(index * 1234567) / 100,
+        }
+        for index in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    renderer = JSONRenderer()
+    candidates = {
+        "drf serializer": lambda: renderer.render(
+            TransactionSerializer(rows, many=True).data
+        ),
+        "row encoder (stdlib)": lambda: RowEncoder(
+            ["key", "value"], backend="stdlib"
+        ).encode(rows),
+    }
+    if orjson is not None:
+        candidates["row encoder (orjson)"] = lambda: RowEncoder(
+            ["key", "value"], backend="orjson"
+        ).encode(rows)
+
+    # Every encoder but the serializer keeps the decimals intact
+    expected = [[row["key"], str(row["value"])] for row in rows]
+    for name, encode in candidates.items():
+        if name == "drf serializer":
+            continue
+        decoded = json.loads(encode(), parse_float=Decimal)
+        assert [[row["key"], str(row["value"])] for row in decoded] == expected, name
+
+    print(f"{args.rows} rows")
+    print(f"{'encoder':<22} {'ms/payload':>12} {'speedup':>8}")
+    baseline = None
+    for name, encode in candidates.items():
+        elapsed = min(timeit.repeat(encode, number=1, repeat=args.repeat))
+        baseline = baseline or elapsed
+        print(f"{name:<22} {elapsed * 1e3:>12.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
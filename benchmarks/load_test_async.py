@@ -0,0 +1,104 @@
+"""
+Load test comparing the throughput of the sync and async transaction endpoints under
+concurrency.
+
+Every path is requested once through the sync endpoint and once through its async
+counterpart under `/async/`, by a number of concurrent clients for a fixed duration.
+Run the server under ASGI with a single worker, e.g.
+`uvicorn zibal.asgi:application --workers 1`, and set the history cache time to live
+to 0 to measure the aggregations rather than the cache.
+
+Usage:
+    python benchmarks/load_test_async.py [--base-url URL] [--concurrency N]
+        [--duration SECONDS] [--path PATH ...]
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    "/api/transactions/transaction-history/?type=amount&mode=daily",
+    "/api/transactions/transaction-summary/?type=amount&mode=daily&live=true",
+]
+
+
+def get_async_path(path):
+    route, _, query = path.partition("?")
+    return f"{route.rstrip('/')}/async/?{query}"
+
+
+def run_client(base_url, path, deadline, latencies, errors):
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(type(error).__name__)
+            connection.close()
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def run_load(base_url, path, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    clients = [
+        threading.Thread(
+            target=run_client, args=(base_url, path, deadline, latencies, errors)
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def format_result(name, latencies, errors, elapsed):
+    if not latencies:
+        return f"{name:<6} no successful requests, {len(errors)} errors"
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return (
+        f"{name:<6} {len(latencies) / elapsed:>9.1f} req/s"
+        f"  p50 {statistics.median(latencies) * 1e3:>8.1f} ms"
+        f"  p95 {p95 * 1e3:>8.1f} ms  errors {len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--path", action="append", dest="paths")
+    args = parser.parse_args()
+
+    for path in args.paths or DEFAULT_PATHS:
+        print(f"{path} ({args.concurrency} clients, {args.duration:g}s)")
+        for name, variant in [("sync", path), ("async", get_async_path(path))]:
+            print(
+                format_result(
+                    name,
+                    *run_load(args.base_url, variant, args.concurrency, args.duration),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
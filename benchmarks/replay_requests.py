@@ -0,0 +1,257 @@
+"""
+Load driver replaying the requests captured by `RequestLogMiddleware` against a
+running server, reporting the latency percentiles and throughput of every route and
+the MongoDB operations the replay caused.
+
+The captured GET and POST requests are replayed in log order by a number of
+concurrent clients, either once per `--loops` or repeatedly for `--duration` seconds.
+POST requests whose body was not captured whole are skipped. Run the server against a
+local mongod, e.g. filled by the generate_synthetic_transactions command, and pass
+`--mongo-uri` to count the operations from the server status of that mongod.
+
+Usage:
+    python benchmarks/replay_requests.py LOG [LOG ...] [--base-url URL]
+        [--concurrency N] [--loops N | --duration SECONDS] [--warmup N]
+        [--path-prefix PREFIX] [--mongo-uri URI] [--output FILE]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from results import save_results, summarize_latencies  # noqa: E402
+
+# Lines written with the "verbose" formatter: "{levelname} {asctime} {module} {message}"
+LOG_LINE = re.compile(
+    r"^(?P<levelname>[A-Z]+) (?P<asctime>\S+ \S+) (?P<module>\S+) (?P<message>\{.*\})$"
+)
+
+REPLAYED_METHODS = ["GET", "POST"]
+
+# The server status counters of the operations mongod served
+OPCOUNTERS = ["insert", "query", "update", "delete", "getmore", "command"]
+
+
+def read_requests(paths, path_prefix):
+    """
+    Reads the requests to replay from request log files.
+
+    Parameters:
+    - paths (list): The log files, in order.
+    - path_prefix (str): Only requests whose path starts with this are replayed.
+
+    Returns:
+    - tuple:
+        - requests (list): A (method, path, body) tuple per request, where body is
+          the JSON encoded request body or None.
+        - skipped (int): The number of logged requests that cannot be replayed.
+    """
+    requests, skipped = [], 0
+    for path in paths:
+        with open(path) as file:
+            for line in file:
+                match = LOG_LINE.match(line.rstrip("\n"))
+                if match is None:
+                    continue
+                try:
+                    entry = json.loads(match["message"])
+                except ValueError:
+                    skipped += 1
+                    continue
+                method = entry.get("request_method")
+                request_path = entry.get("request_path", "")
+                if method not in REPLAYED_METHODS or not request_path.startswith(
+                    path_prefix
+                ):
+                    continue
+                body = None
+                if method == "POST":
+                    body = entry.get("request_body")
+                    if isinstance(body, (dict, list)):
+                        # Logs of earlier versions hold the parsed body
+                        body = json.dumps(body)
+                    elif not isinstance(body, str) or entry.get(
+                        "request_body_truncated"
+                    ):
+                        # Bodies that were not captured whole cannot be sent again
+                        skipped += 1
+                        continue
+                requests.append((method, request_path, body))
+    return requests, skipped
+
+
+def get_route(path):
+    return path.partition("?")[0]
+
+
+def run_client(base_url, queue, lock, deadline, latencies, errors):
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    while deadline is None or time.perf_counter() < deadline:
+        with lock:
+            request = next(queue, None)
+        if request is None:
+            break
+        method, path, body = request
+        route = get_route(path)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as error:
+            errors[route].append(type(error).__name__)
+            connection.close()
+            continue
+        if response.status >= 400:
+            errors[route].append(response.status)
+        else:
+            latencies[route].append(time.perf_counter() - started)
+    connection.close()
+
+
+def replay(base_url, requests, concurrency, deadline=None):
+    """
+    Replays the requests with concurrent clients until they run out or the deadline.
+
+    Returns:
+    - tuple:
+        - latencies (dict): The latencies of the successful requests of every route.
+        - errors (dict): The status codes or exception names of the failed requests
+          of every route.
+        - elapsed (float): The wall clock duration of the replay, in seconds.
+    """
+    latencies, errors = defaultdict(list), defaultdict(list)
+    queue, lock = iter(requests), threading.Lock()
+    clients = [
+        threading.Thread(
+            target=run_client,
+            args=(base_url, queue, lock, deadline, latencies, errors),
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def read_opcounters(client):
+    if client is None:
+        return None
+    opcounters = client.admin.command("serverStatus")["opcounters"]
+    return {name: opcounters[name] for name in OPCOUNTERS}
+
+
+def format_summary(name, summary):
+    if not summary["requests"]:
+        return f"{name:<56} no successful requests, {summary['errors']} errors"
+    return (
+        f"{name:<56} {summary['requests']:>7} {summary['throughput']:>9.1f} req/s"
+        f"  p50 {summary['p50_ms']:>8.1f}  p95 {summary['p95_ms']:>8.1f}"
+        f"  p99 {summary['p99_ms']:>8.1f} ms  errors {summary['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="Request log files to replay.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--loops", type=int, default=1)
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Replay the requests in a loop for this many seconds instead of --loops.",
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=0, help="Requests replayed before measuring."
+    )
+    parser.add_argument("--path-prefix", default="/api/")
+    parser.add_argument(
+        "--mongo-uri",
+        default=os.getenv("DB_CONNECTION_STRING"),
+        help="The mongod to read the operation counters of "
+        "(defaults to DB_CONNECTION_STRING).",
+    )
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    args = parser.parse_args()
+
+    requests, skipped = read_requests(args.logs, args.path_prefix)
+    if not requests:
+        parser.error("No replayable requests found in the logs")
+    print(f"{len(requests)} requests to replay, {skipped} skipped")
+
+    mongo_client = None
+    if args.mongo_uri:
+        from pymongo import MongoClient
+
+        mongo_client = MongoClient(args.mongo_uri)
+
+    if args.warmup:
+        replay(args.base_url, requests[: args.warmup], args.concurrency)
+
+    if args.duration:
+        queue = itertools.cycle(requests)
+        deadline = time.perf_counter() + args.duration
+    else:
+        queue = itertools.chain.from_iterable(itertools.repeat(requests, args.loops))
+        deadline = None
+
+    opcounters_before = read_opcounters(mongo_client)
+    latencies, errors, elapsed = replay(
+        args.base_url, queue, args.concurrency, deadline
+    )
+    opcounters_after = read_opcounters(mongo_client)
+
+    results = {"routes": {}}
+    for route in sorted(set(latencies) | set(errors)):
+        results["routes"][route] = summarize_latencies(
+            latencies[route], errors[route], elapsed
+        )
+        print(format_summary(route, results["routes"][route]))
+    results["overall"] = summarize_latencies(
+        list(itertools.chain.from_iterable(latencies.values())),
+        list(itertools.chain.from_iterable(errors.values())),
+        elapsed,
+    )
+    print(format_summary("overall", results["overall"]))
+
+    if opcounters_before is not None:
+        # Server wide counters, so other clients of the mongod are counted too
+        operations = {
+            name: opcounters_after[name] - opcounters_before[name]
+            for name in OPCOUNTERS
+        }
+        replayed = results["overall"]["requests"] + results["overall"]["errors"]
+        results["mongo_opcounters"] = operations
+        results["mongo_operations_per_request"] = (
+            sum(operations.values()) / replayed if replayed else None
+        )
+        print(
+            "mongo operations: "
+            + ", ".join(f"{name} {count}" for name, count in operations.items())
+        )
+
+    if args.output:
+        parameters = {**vars(args), "requests": len(requests), "skipped": skipped}
+        # Keep credentials out of the results
+        parameters.pop("mongo_uri")
+        save_results(args.output, "replay_requests", parameters, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Shared helpers of the benchmarks to summarize latencies and save results as JSON, so
+runs can be compared over time.
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the nearest-rank percentile of already sorted values.
+    """
+    index = max(0, min(len(sorted_values) - 1, int(len(sorted_values) * fraction)))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies, errors, elapsed):
+    """
+    Summarizes the latencies of a load run.
+
+    Parameters:
+    - latencies (list): The latency of every successful request, in seconds.
+    - errors (list): The status code or exception name of every failed request.
+    - elapsed (float): The wall clock duration of the run, in seconds.
+
+    Returns:
+    - summary (dict): The request and error counts, the throughput in requests per
+      second and the p50, p95, p99, mean and max latencies in milliseconds.
+    """
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+    }
+    if latencies:
+        summary.update(
+            {
+                "p50_ms": percentile(latencies, 0.50) * 1e3,
+                "p95_ms": percentile(latencies, 0.95) * 1e3,
+                "p99_ms": percentile(latencies, 0.99) * 1e3,
+                "mean_ms": sum(latencies) / len(latencies) * 1e3,
+                "max_ms": latencies[-1] * 1e3,
+            }
+        )
+    return summary
+
+
+def get_git_commit():
+    """
+    Returns the commit the benchmarked tree is at, or None outside of a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, benchmark, parameters, results):
+    """
+    Writes the results of a benchmark run as JSON, along with what was measured.
+
+    Parameters:
+    - path (str): The file to write.
+    - benchmark (str): The name of the benchmark.
+    - parameters (dict): The options of the run.
+    - results (dict): The measurements of the run.
+    """
+    document = {
+        "benchmark": benchmark,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "parameters": parameters,
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2, default=str)
+    print(f"Saved results to {path}")
@@ -2,6 +2,7 @@ from celery import shared_task
 
 from notifications.models import Notification
 from notifications.tasks import process_notification
+from transactions.helpers import get_period_start
 from transactions.models import TransactionSummary
 
 
@@ -13,8 +14,13 @@ def send_daily_reports():
     report_date = datetime.utcnow() - timedelta(days=1)
     report_date_str = report_date.strftime("%Y-%m-%d")
 
-    # Get all merchant IDs from TransactionSummary for the report date
-    merchant_ids = TransactionSummary.objects(date=report_date).distinct("merchantId")
+    # Get the daily summaries of all merchants for the report date, which hold both
+    # the count and the amount of the day
+    summaries = TransactionSummary.objects(
+        mode="daily",
+        date=get_period_start(report_date, "daily"),
+        merchantId__ne=None,
+    )
 
     # Define a mapping of merchant IDs to their contact info and names(Mock)
     merchant_info = {
@@ -30,23 +36,11 @@ def send_daily_reports():
         },
     }
 
-    for merchant_id in merchant_ids:
+    for summary in summaries:
         # Convert merchant_id to string if necessary
+        merchant_id = summary.merchantId
         merchant_id_str = str(merchant_id)
 
-        # Get transaction summaries for the merchant
-        # Assuming you have separate summaries for 'count' and 'amount'
-        count_summary = TransactionSummary.objects(
-            merchantId=merchant_id, date=report_date, stat_type="count", mode="daily"
-        ).first()
-
-        amount_summary = TransactionSummary.objects(
-            merchantId=merchant_id, date=report_date, stat_type="amount", mode="daily"
-        ).first()
-
-        if not count_summary or not amount_summary:
-            continue  # No transactions for this merchant on this date
-
         # Get merchant info from the mapping
         info = merchant_info.get(merchant_id_str, "merchant_data")
         if not info:
@@ -68,8 +62,9 @@ def send_daily_reports():
             template_name="daily_report",
             context_data={
                 "merchant_name": merchant_name,
-                "transaction_count": count_summary.value,
-                "transaction_amount": amount_summary.value,
+                "transaction_count": summary.count,
+                # Decimals cannot be stored in the context as they are
+                "transaction_amount": str(summary.amount),
                 "date": report_date_str,
             },
         )
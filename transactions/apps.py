@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TransactionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "transactions"
+
+    def ready(self):
+        from transactions.helpers import get_calendar_index
+
+        # Build the calendar index at startup rather than on the first request
+        get_calendar_index()
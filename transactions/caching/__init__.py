@@ -0,0 +1,2 @@
+from .response_cache import ResponseCache, history_cache
+from .single_flight import SingleFlight
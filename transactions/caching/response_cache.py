@@ -0,0 +1,273 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    A tiered cache for API responses backed by Django cache aliases.
+
+    Lookups go through the tiers in order, typically an in-process LRU
+    (LocMemCache) followed by a shared Redis cache, and a hit in a later tier
+    refills the earlier ones. Entries are namespaced by a generation number, so
+    `invalidate` drops every entry at once.
+
+    The generation and the hit and miss counters are kept in the process, and
+    synchronized with `generation_tier` at most every `generation_ttl` seconds, so a
+    hit in the first tier costs no round trip to a shared tier. The generation tier
+    must not evict keys, or stale entries would come back with an older generation.
+    Without one, entries only expire with their time to live, and `invalidate` and
+    `stats`, which would only reach the current process, raise ImproperlyConfigured.
+
+    Attributes:
+    ----------
+    name : str
+        Prefix of every key written by this cache.
+    tiers : list
+        Django cache aliases, fastest first.
+    ttls : dict
+        Time to live in seconds per grouping mode.
+    default_ttl : int
+        Time to live in seconds for modes missing from `ttls`.
+    single_flight : SingleFlight
+        Coalesces concurrent misses for the same entry into one computation.
+    generation_tier : str or None
+        Django cache alias the generation and counters are shared through.
+    generation_ttl : float
+        Seconds the generation is used before it is read from `generation_tier` again.
+    """
+
+    def __init__(
+        self,
+        name,
+        tiers,
+        ttls=None,
+        default_ttl=60,
+        single_flight=None,
+        generation_tier=None,
+        generation_ttl=1.0,
+    ):
+        self.name = name
+        self.tiers = tiers
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.single_flight = single_flight or SingleFlight()
+        self.generation_tier = generation_tier
+        self.generation_ttl = generation_ttl
+        self.generation = 0
+        self.generation_expires_at = 0.0
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.generation_tier]
+
+    def get(self, mode, params):
+        """
+        Returns the cached value for the given mode and parameters, or None on a miss.
+
+        Parameters:
+        ----------
+        mode : str
+            The grouping mode, used to pick the time to live.
+        params : tuple
+            The normalized request parameters identifying the response.
+        """
+        try:
+            key = self.make_key(mode, params)
+            for index, alias in enumerate(self.tiers):
+                value = caches[alias].get(key)
+                if value is not None:
+                    for faster_alias in self.tiers[:index]:
+                        caches[faster_alias].set(key, value, self.get_ttl(mode))
+                    self.count(f"hits:{alias}")
+                    return value
+            self.count("misses")
+        except Exception as error:
+            logger.warning(f"Response cache {self.name} lookup failed: {error}")
+        return None
+
+    def get_or_set(self, mode, params, compute):
+        """
+        Returns the cached value, computing and storing it on a miss. Concurrent misses
+        for the same entry wait for a single computation and share its result.
+
+        Parameters:
+        ----------
+        mode : str
+            The grouping mode, used to pick the time to live.
+        params : tuple
+            The normalized request parameters identifying the response.
+        compute : callable
+            Computes the value when it is not cached.
+        """
+        value = self.get(mode, params)
+        if value is not None:
+            return value
+
+        def compute_and_set():
+            value = compute()
+            self.set(mode, params, value)
+            return value
+
+        def lookup():
+            try:
+                return self.shared.get(self.make_key(mode, params))
+            except Exception:
+                return None
+
+        try:
+            key = self.make_key(mode, params)
+        except Exception:
+            return compute()
+        return self.single_flight.do(key, compute_and_set, lookup=lookup)
+
+    def set(self, mode, params, value):
+        """
+        Stores a value in every tier for the given mode and parameters.
+        """
+        try:
+            key = self.make_key(mode, params)
+            for alias in self.tiers:
+                caches[alias].set(key, value, self.get_ttl(mode))
+        except Exception as error:
+            logger.warning(f"Response cache {self.name} store failed: {error}")
+
+    def invalidate(self):
+        """
+        Drops every cached response by moving all tiers to a new generation.
+
+        Raises:
+        ------
+        ImproperlyConfigured
+            If there is no generation tier to reach the other processes through.
+        """
+        self.require_generation_tier("invalidated")
+        with self.lock:
+            self.generation += 1
+        key = f"{self.name}:generation"
+        try:
+            try:
+                generation = self.shared.incr(key)
+            except ValueError:
+                # incr raises ValueError when the key does not exist yet
+                self.shared.set(key, 1, None)
+                generation = 1
+            with self.lock:
+                self.generation = generation
+                self.generation_expires_at = time.monotonic() + self.generation_ttl
+        except Exception as error:
+            logger.warning(f"Response cache {self.name} invalidation failed: {error}")
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of every process using the cache.
+
+        Returns:
+        -------
+        dict
+            The current generation, the misses and the hits of every tier.
+
+        Raises:
+        ------
+        ImproperlyConfigured
+            If there is no generation tier the counters are shared through.
+        """
+        self.require_generation_tier("inspected")
+        counters = [f"hits:{alias}" for alias in self.tiers] + ["misses"]
+        self.refresh_generation()
+        values = self.shared.get_many([f"{self.name}:{name}" for name in counters])
+        stats = {name: values.get(f"{self.name}:{name}", 0) for name in counters}
+        stats["generation"] = self.generation
+        return stats
+
+    def reset_stats(self):
+        """
+        Resets the hit and miss counters.
+
+        Raises:
+        ------
+        ImproperlyConfigured
+            If there is no generation tier the counters are shared through.
+        """
+        self.require_generation_tier("reset")
+        counters = [f"hits:{alias}" for alias in self.tiers] + ["misses"]
+        with self.lock:
+            self.counters.clear()
+        self.shared.delete_many([f"{self.name}:{name}" for name in counters])
+
+    def require_generation_tier(self, action):
+        if self.generation_tier is None:
+            raise ImproperlyConfigured(
+                f"Response cache {self.name} has no generation tier, so it cannot be "
+                f"{action} across processes"
+            )
+
+    def count(self, name):
+        if self.generation_tier is None:
+            # Nothing reads the counters of a single process
+            return
+        with self.lock:
+            self.counters[name] += 1
+
+    def get_generation(self):
+        """
+        Returns the generation, reading it from the generation tier once it expired.
+        """
+        if time.monotonic() >= self.generation_expires_at:
+            self.refresh_generation()
+        return self.generation
+
+    def refresh_generation(self):
+        """
+        Reads the generation from the generation tier and adds the counters of the
+        process to the shared ones. Errors keep the last known generation.
+        """
+        if self.generation_tier is None:
+            return
+        with self.lock:
+            self.generation_expires_at = time.monotonic() + self.generation_ttl
+            counters, self.counters = self.counters, Counter()
+        try:
+            for name, count in counters.items():
+                key = f"{self.name}:{name}"
+                # add is a no-op when the counter already exists
+                self.shared.add(key, 0, None)
+                self.shared.incr(key, count)
+            generation = self.shared.get(f"{self.name}:generation", 0)
+        except Exception as error:
+            logger.warning(f"Response cache {self.name} refresh failed: {error}")
+            return
+        with self.lock:
+            self.generation = generation
+
+    def get_ttl(self, mode):
+        return self.ttls.get(mode, self.default_ttl)
+
+    def make_key(self, mode, params):
+        parts = [self.name, str(self.get_generation()), mode]
+        parts.extend("" if param is None else str(param) for param in params)
+        return ":".join(parts)
+
+
+history_cache = ResponseCache(
+    "transaction-history",
+    settings.TRANSACTION_HISTORY_CACHE["TIERS"],
+    ttls=settings.TRANSACTION_HISTORY_CACHE["TTLS"],
+    single_flight=SingleFlight(
+        redis_url=settings.TRANSACTION_HISTORY_CACHE["SINGLE_FLIGHT_REDIS_URL"],
+        lock_timeout=settings.TRANSACTION_HISTORY_CACHE["SINGLE_FLIGHT_TIMEOUT"],
+    ),
+    generation_tier=settings.TRANSACTION_HISTORY_CACHE["GENERATION_TIER"],
+    generation_ttl=settings.TRANSACTION_HISTORY_CACHE["GENERATION_TTL"],
+)
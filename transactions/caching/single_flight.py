@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Call:
+    """
+    An in-flight execution that concurrent callers with the same key wait on.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single execution.
+
+    Within a process, callers that arrive while a call for their key is in flight
+    wait for it and share its result. When a Redis URL is given, the leader of each
+    process also takes a Redis lock, so only one process computes the value while the
+    others poll the shared store it writes to.
+
+    Attributes:
+    ----------
+    redis_url : str
+        Optional. The Redis server used for the cross-process lock.
+    lock_timeout : float
+        Seconds before a cross-process lock expires and waiting processes give up.
+    poll_interval : float
+        Seconds between two lookups of a waiting process.
+    """
+
+    def __init__(self, redis_url=None, lock_timeout=30, poll_interval=0.05):
+        self.redis_url = redis_url
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def do(self, key, func, lookup=None):
+        """
+        Runs `func` unless a call with the same key is already in flight.
+
+        Parameters:
+        ----------
+        key : str
+            Identifies calls that are interchangeable.
+        func : callable
+            Computes the value; across processes it must also store it where
+            `lookup` finds it.
+        lookup : callable, optional
+            Returns the value stored by another process, or None. Cross-process
+            coalescing is only used when it is given.
+
+        Returns:
+        -------
+        object
+            The value computed by this or the concurrent call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.redis_url and lookup is not None:
+                call.result = self.do_distributed(key, func, lookup)
+            else:
+                call.result = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def do_distributed(self, key, func, lookup):
+        """
+        Runs `func` in at most one process at a time, others wait for its result.
+        """
+        try:
+            lock = self.redis.lock(
+                f"single-flight:{key}", timeout=self.lock_timeout, blocking=False
+            )
+            acquired = lock.acquire()
+        except Exception as error:
+            logger.warning(f"Single flight lock for {key} failed: {error}")
+            return func()
+
+        if acquired:
+            try:
+                return func()
+            finally:
+                try:
+                    lock.release()
+                except Exception:
+                    # The lock expired while computing
+                    pass
+
+        # Another process computes the value; wait until it is stored
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            value = lookup()
+            if value is not None:
+                return value
+            try:
+                locked = self.redis.exists(lock.name)
+            except Exception:
+                break
+            if not locked:
+                # The leader is done; it stored the value unless it failed
+                value = lookup()
+                if value is not None:
+                    return value
+                break
+            time.sleep(self.poll_interval)
+        return func()
@@ -1,4 +1,40 @@
+from .build_jalali_boundaries import build_jalali_boundaries
+from .calendar_index import CalendarIndex, get_calendar_index
 from .construct_aggregation_group_and_sort_fields import (
     construct_aggregation_group_and_sort_fields,
 )
+from .construct_history_cache_entry import construct_history_cache_entry
+from .construct_history_pipeline import construct_history_pipeline
+from .construct_jalali_bucket_pipeline import construct_jalali_bucket_pipeline
+from .construct_live_tail_pipeline import construct_live_tail_pipeline
+from .construct_period_start_expression import construct_period_start_expression
 from .format_group_id_to_date_key import format_group_id_to_date_key
+from .get_bucket_date import get_bucket_date
+from .get_jalali_period_end import get_jalali_period_end
+from .get_jalali_period_start import get_jalali_period_start
+from .get_local_midnight import get_local_midnight
+from .get_not_modified_response import (
+    get_not_modified_response,
+    get_validators,
+    patch_validators,
+)
+from .get_page_end import get_page_end
+from .get_period_end import get_period_end
+from .get_period_start import get_period_start
+from .get_start_date import get_start_date
+from .history_query_plans import (
+    plan_created_at,
+    plan_history_page,
+    plan_history_rows,
+    plan_jalali_pipeline,
+)
+from .merge_live_tail import merge_live_tail
+from .parse_batch_body import parse_batch_body
+from .parse_merchant_ids import parse_merchant_ids
+from .parse_stats_query_params import parse_stats_query_params
+from .run_query_plan import run_query_plan, run_query_plan_async
+from .summary_query_plans import (
+    plan_generation_state,
+    plan_rendered_content,
+    plan_summary_rows,
+)
@@ -0,0 +1,48 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .calendar_index import format_date_key, get_calendar_index
+from .get_jalali_period_end import get_jalali_period_end
+from .get_jalali_period_start import get_jalali_period_start
+from .get_local_midnight import get_local_midnight
+
+
+def build_jalali_boundaries(mode, start, end):
+    """
+    Builds the bucket boundaries of the Jalali periods overlapping [start, end), in
+    the Jalali calendar time zone.
+
+    Parameters:
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - start (datetime): The first moment to cover, as a naive UTC datetime.
+    - end (datetime): The exclusive last moment to cover, as a naive UTC datetime.
+
+    Returns:
+    - tuple:
+        - boundaries (list): The naive UTC start of every period, followed by the
+          exclusive end of the last one.
+        - dates (list): The local start date of every period.
+        - labels (list): The Jalali date key of every period.
+    """
+    calendar_index = get_calendar_index()
+    zone = ZoneInfo(settings.JALALI_CALENDAR_TIME_ZONE)
+    local_start = start.replace(tzinfo=datetime.timezone.utc).astimezone(zone)
+
+    boundaries, dates, labels = [], [], []
+    day = get_jalali_period_start(local_start.date(), mode)
+    while True:
+        boundary = get_local_midnight(day)
+        boundaries.append(boundary)
+        if boundary >= end:
+            break
+        dates.append(datetime.datetime(day.year, day.month, day.day))
+        # Daily keys do not depend on the calendar the periods are aligned to
+        labels.append(
+            calendar_index.get_key(day, mode)
+            if mode == "daily"
+            else format_date_key(day, mode)
+        )
+        day = get_jalali_period_end(day, mode)
+    return boundaries, dates, labels
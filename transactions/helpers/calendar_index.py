@@ -0,0 +1,153 @@
+import datetime
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+from khayyam import JalaliDate
+
+# Every daily key is a 'YYYY/MM/DD' Jalali date
+DAILY_KEY_WIDTH = 10
+
+
+def format_date_key(date, mode):
+    """
+    Formats the period starting at the given date into its Jalali date key, using
+    khayyam directly. This is the slow path the calendar index is built from.
+
+    Parameters:
+    - date (date): The start date of the period.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+    Returns:
+    - key (str): The formatted date key.
+
+    Raises:
+    - ValueError: If the mode is not one of 'daily', 'weekly', or 'monthly'.
+    """
+    jalali_date = JalaliDate(date)
+    if mode == "daily":
+        key = jalali_date.strftime("%Y/%m/%d")
+    elif mode == "weekly":
+        week_number = int(jalali_date.strftime("%W"))
+        key = f"{jalali_date.year} هفته {week_number} سال"
+    elif mode == "monthly":
+        month_name = jalali_date.strftime("%B")
+        key = f"{jalali_date.year} {month_name}"
+    else:
+        raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
+    return key
+
+
+class CalendarIndex:
+    """
+    A precomputed table from Gregorian day ordinal to the Jalali date key and the
+    period start of every grouping mode.
+
+    Daily keys are packed as fixed width ASCII into one buffer. Weekly and monthly
+    keys are formatted once per period and referenced from every day through compact
+    arrays, next to the ordinals of the ISO week and month each day belongs to.
+    Dates outside of the table fall back to computing the value directly.
+
+    Attributes:
+        first_ordinal (int): The ordinal of the first day in the table.
+        size (int): The number of days in the table.
+    """
+
+    def __init__(self, first_day, last_day):
+        self.first_ordinal = first_day.toordinal()
+        self.size = last_day.toordinal() - self.first_ordinal + 1
+
+        self.daily_keys = bytearray(self.size * DAILY_KEY_WIDTH)
+        self.week_starts = array("l")
+        self.month_starts = array("l")
+        self.week_key_ids = array("l")
+        self.month_key_ids = array("l")
+        self.week_keys = []
+        self.month_keys = []
+
+        for offset in range(self.size):
+            ordinal = self.first_ordinal + offset
+            date = datetime.date.fromordinal(ordinal)
+            jalali_date = JalaliDate(date)
+            position = offset * DAILY_KEY_WIDTH
+            self.daily_keys[position : position + DAILY_KEY_WIDTH] = (
+                f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
+            ).encode("ascii")
+
+            week_start = ordinal - date.weekday()
+            if offset == 0 or week_start == ordinal:
+                self.week_keys.append(
+                    format_date_key(datetime.date.fromordinal(week_start), "weekly")
+                )
+            self.week_starts.append(week_start)
+            self.week_key_ids.append(len(self.week_keys) - 1)
+
+            month_start = ordinal - date.day + 1
+            if offset == 0 or month_start == ordinal:
+                self.month_keys.append(
+                    format_date_key(datetime.date.fromordinal(month_start), "monthly")
+                )
+            self.month_starts.append(month_start)
+            self.month_key_ids.append(len(self.month_keys) - 1)
+
+    def get_offset(self, date):
+        offset = date.toordinal() - self.first_ordinal
+        return offset if 0 <= offset < self.size else None
+
+    def get_key(self, date, mode):
+        """
+        Returns the Jalali date key of the period starting at the given date.
+
+        Parameters:
+        - date (date): The start date of the period.
+        - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+        Returns:
+        - key (str): The formatted date key, as `format_date_key` would return it.
+        """
+        offset = self.get_offset(date)
+        if offset is None:
+            return format_date_key(date, mode)
+        if mode == "daily":
+            position = offset * DAILY_KEY_WIDTH
+            return self.daily_keys[position : position + DAILY_KEY_WIDTH].decode(
+                "ascii"
+            )
+        elif mode == "weekly":
+            return self.week_keys[self.week_key_ids[offset]]
+        elif mode == "monthly":
+            return self.month_keys[self.month_key_ids[offset]]
+        raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
+
+    def get_period_start_ordinal(self, date, mode):
+        """
+        Returns the ordinal of the first day of the period containing the given date,
+        or None if the date is outside of the table.
+
+        Parameters:
+        - date (date): Any day within the period.
+        - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+        """
+        offset = self.get_offset(date)
+        if offset is None:
+            return None
+        if mode == "daily":
+            return self.first_ordinal + offset
+        elif mode == "weekly":
+            return self.week_starts[offset]
+        elif mode == "monthly":
+            return self.month_starts[offset]
+        raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
+
+
+@lru_cache(maxsize=None)
+def get_calendar_index():
+    """
+    Returns the process wide calendar index, building it on first use.
+
+    The covered years are set by `JALALI_CALENDAR_INDEX_YEARS`.
+    """
+    first_year, last_year = settings.JALALI_CALENDAR_INDEX_YEARS
+    return CalendarIndex(
+        datetime.date(first_year, 1, 1), datetime.date(last_year, 12, 31)
+    )
@@ -1,9 +1,10 @@
-def construct_aggregation_group_and_sort_fields(mode):
+def construct_aggregation_group_and_sort_fields(mode, date_field="$createdAt"):
     """
     Constructs the group identifier and sort fields for MongoDB aggregation based on the given mode.
 
     Parameters:
     - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - date_field (str): Optional. The date field path to group on, defaults to '$createdAt'.
 
     Returns:
     - tuple:
@@ -12,9 +13,9 @@ def construct_aggregation_group_and_sort_fields(mode):
     """
     if mode == "daily":
         group_id = {
-            "year": {"$year": "$createdAt"},
-            "month": {"$month": "$createdAt"},
-            "day": {"$dayOfMonth": "$createdAt"},
+            "year": {"$year": date_field},
+            "month": {"$month": date_field},
+            "day": {"$dayOfMonth": date_field},
         }
         sort_fields = {
             "_id.year": 1,
@@ -23,8 +24,8 @@ def construct_aggregation_group_and_sort_fields(mode):
         }
     elif mode == "weekly":
         group_id = {
-            "isoYear": {"$isoWeekYear": "$createdAt"},
-            "isoWeek": {"$isoWeek": "$createdAt"},
+            "isoYear": {"$isoWeekYear": date_field},
+            "isoWeek": {"$isoWeek": date_field},
         }
         sort_fields = {
             "_id.isoYear": 1,
@@ -32,8 +33,8 @@ def construct_aggregation_group_and_sort_fields(mode):
         }
     elif mode == "monthly":
         group_id = {
-            "year": {"$year": "$createdAt"},
-            "month": {"$month": "$createdAt"},
+            "year": {"$year": date_field},
+            "month": {"$month": date_field},
         }
         sort_fields = {
             "_id.year": 1,
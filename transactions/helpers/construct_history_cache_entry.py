@@ -0,0 +1,26 @@
+import hashlib
+
+
+def construct_history_cache_entry(rows, next_date=None):
+    """
+    Wraps aggregated history rows into the entry cached for them, along with the
+    validators of the responses rendered from it.
+
+    Parameters:
+    - rows (list): The aggregated rows, with their date 'key' and both the 'amount'
+      and 'count' totals.
+    - next_date (datetime): Optional. The start date of the next page, when it does
+      not start at the last of the rows, see `get_bucket_date`.
+
+    Returns:
+    - entry (dict): The 'rows', the 'next_date' and a 'digest' of their content,
+      which stays the same when an expired entry is recomputed without changes.
+    """
+    content = repr(
+        ([(row["key"], row["amount"], row["count"]) for row in rows], next_date)
+    )
+    return {
+        "rows": rows,
+        "next_date": next_date,
+        "digest": hashlib.blake2b(content.encode(), digest_size=12).hexdigest(),
+    }
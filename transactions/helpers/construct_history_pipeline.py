@@ -0,0 +1,46 @@
+from .construct_aggregation_group_and_sort_fields import (
+    construct_aggregation_group_and_sort_fields,
+)
+
+
+def construct_history_pipeline(mode, match_stage, limit=None, group_by_merchant=False):
+    """
+    Constructs the aggregation pipeline that groups transactions into date buckets.
+
+    Parameters:
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - match_stage (dict): The filter applied to the transactions before grouping.
+    - limit (int): Optional. The maximum number of buckets to return.
+    - group_by_merchant (bool): Optional. Whether to bucket every merchant separately,
+      sorted by merchant first.
+
+    Returns:
+    - pipeline (list): Stages yielding one row per bucket, with the group identifier
+      as '_id' and the 'total_amount' and 'total_count' of its transactions, sorted by date.
+    """
+    # Get group and sort criteria
+    group_id, sort_fields = construct_aggregation_group_and_sort_fields(mode)
+
+    if group_by_merchant:
+        # Include merchantId in group_id
+        group_id["merchantId"] = "$merchantId"
+        sort_fields = {"_id.merchantId": 1, **sort_fields}
+
+    # Build the sort stage
+    sort_stage = {"$sort": dict(sort_fields)}
+
+    # Define the aggregation pipeline
+    pipeline = [
+        {"$match": match_stage},
+        {
+            "$group": {
+                "_id": group_id,
+                "total_amount": {"$sum": "$amount"},
+                "total_count": {"$sum": 1},
+            }
+        },
+        sort_stage,
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    return pipeline
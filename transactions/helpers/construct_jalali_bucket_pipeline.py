@@ -0,0 +1,61 @@
+def construct_jalali_bucket_pipeline(
+    match_stage, boundaries, dates, labels, limit=None
+):
+    """
+    Constructs the aggregation pipeline that buckets transactions into Jalali periods.
+
+    The periods are applied with `$bucket` on `createdAt`, and every bucket is labelled
+    inside MongoDB by looking its lower boundary up in the period tables.
+
+    Parameters:
+    - match_stage (dict): The filter applied to the transactions before bucketing; its
+      `createdAt` range is replaced by the range the boundaries cover.
+    - boundaries (list): The period boundaries, see `build_jalali_boundaries`.
+    - dates (list): The local start date of every period.
+    - labels (list): The Jalali date key of every period.
+    - limit (int): Optional. The maximum number of buckets to return.
+
+    Returns:
+    - pipeline (list): Stages yielding one row per non-empty bucket with its date 'key',
+      start 'date' and both the 'amount' and 'count' totals, sorted by date.
+    """
+    match_stage = {
+        **match_stage,
+        "createdAt": {"$gte": boundaries[0], "$lt": boundaries[-1]},
+    }
+
+    # Define the aggregation pipeline
+    pipeline = [
+        {"$match": match_stage},
+        {
+            "$bucket": {
+                "groupBy": "$createdAt",
+                "boundaries": boundaries,
+                "output": {
+                    "total_amount": {"$sum": "$amount"},
+                    "total_count": {"$sum": 1},
+                },
+            }
+        },
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+
+    pipeline += [
+        # Find the period each bucket belongs to by its lower boundary
+        {
+            "$addFields": {
+                "period": {"$indexOfArray": [{"$literal": boundaries}, "$_id"]},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "key": {"$arrayElemAt": [{"$literal": labels}, "$period"]},
+                "date": {"$arrayElemAt": [{"$literal": dates}, "$period"]},
+                "amount": "$total_amount",
+                "count": "$total_count",
+            }
+        },
+    ]
+    return pipeline
@@ -0,0 +1,25 @@
+from .construct_history_pipeline import construct_history_pipeline
+
+
+def construct_live_tail_pipeline(params, watermark):
+    """
+    Constructs the aggregation pipeline of the transactions created after the last
+    summary generation.
+
+    Parameters:
+    - params (dict): The parsed query parameters, see `parse_stats_query_params`.
+    - watermark (datetime): The newest `createdAt` covered by the summaries.
+
+    Returns:
+    - pipeline (list): The stages, see `construct_history_pipeline`.
+    """
+    created_at_range = {"$gt": watermark}
+    if params["start"]:
+        created_at_range["$gte"] = params["start"]
+    if params["end"]:
+        created_at_range["$lt"] = params["end"]
+    match_stage = {"createdAt": created_at_range}
+    if params["merchant_id"] is not None:
+        match_stage["merchantId"] = params["merchant_id"]
+
+    return construct_history_pipeline(params["mode"], match_stage)
@@ -0,0 +1,32 @@
+from .construct_aggregation_group_and_sort_fields import (
+    construct_aggregation_group_and_sort_fields,
+)
+
+# Maps group identifier fields to the matching `$dateFromParts` arguments
+DATE_FROM_PARTS_FIELDS = {
+    "year": "year",
+    "month": "month",
+    "day": "day",
+    "isoYear": "isoWeekYear",
+    "isoWeek": "isoWeek",
+}
+
+
+def construct_period_start_expression(mode, date_field="$createdAt"):
+    """
+    Constructs an aggregation expression that evaluates to the start date of the period
+    containing the given date field, using the same buckets as
+    `construct_aggregation_group_and_sort_fields`.
+
+    Parameters:
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - date_field (str): Optional. The date field path to bucket, defaults to '$createdAt'.
+
+    Returns:
+    - expression (dict): A `$dateFromParts` expression for the aggregation pipeline.
+    """
+    group_id, _ = construct_aggregation_group_and_sort_fields(mode, date_field)
+    parts = {DATE_FROM_PARTS_FIELDS[name]: expr for name, expr in group_id.items()}
+    if mode == "weekly":
+        parts["isoDayOfWeek"] = 1
+    return {"$dateFromParts": parts}
@@ -1,6 +1,6 @@
 import datetime
 
-from khayyam import JalaliDate
+from .calendar_index import get_calendar_index
 
 
 def format_group_id_to_date_key(group_id, mode):
@@ -18,25 +18,16 @@ def format_group_id_to_date_key(group_id, mode):
     - ValueError: If the mode is not one of 'daily', 'weekly', or 'monthly'.
 
     """
-
-    group_id = {k: v for k, v in group_id.items() if k != "merchantId"}
-
     if mode == "daily":
-        date = datetime.datetime(group_id["year"], group_id["month"], group_id["day"])
-        jalali_date = JalaliDate(date)
-        key = jalali_date.strftime("%Y/%m/%d")
+        date = datetime.date(group_id["year"], group_id["month"], group_id["day"])
     elif mode == "weekly":
-        iso_year = group_id["isoYear"]
-        iso_week = group_id["isoWeek"]
-        date = datetime.date.fromisocalendar(iso_year, iso_week, 1)
-        jalali_date = JalaliDate(date)
-        week_number = int(jalali_date.strftime("%W"))
-        key = f"{jalali_date.year} هفته {week_number} سال"
+        date = datetime.date.fromisocalendar(
+            group_id["isoYear"], group_id["isoWeek"], 1
+        )
     elif mode == "monthly":
-        date = datetime.datetime(group_id["year"], group_id["month"], 1)
-        jalali_date = JalaliDate(date)
-        month_name = jalali_date.strftime("%B")
-        key = f"{jalali_date.year} {month_name}"
+        date = datetime.date(group_id["year"], group_id["month"], 1)
     else:
         raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
-    return key
+
+    # The key of every date is looked up in the precomputed calendar index
+    return get_calendar_index().get_key(date, mode)
@@ -0,0 +1,28 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .get_jalali_period_start import get_jalali_period_start
+from .get_period_start import get_period_start
+
+
+def get_bucket_date(moment, mode, calendar="gregorian"):
+    """
+    Returns the start date of the bucket that contains the given moment, as used for
+    the pagination cursor.
+
+    Parameters:
+    - moment (datetime): Any moment within the bucket, as a naive UTC datetime.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - calendar (str): Optional. 'gregorian' or 'jalali'.
+
+    Returns:
+    - date (datetime): The start date of the bucket; the local date for 'jalali'.
+    """
+    if calendar == "jalali":
+        zone = ZoneInfo(settings.JALALI_CALENDAR_TIME_ZONE)
+        day = moment.replace(tzinfo=datetime.timezone.utc).astimezone(zone).date()
+        day = get_jalali_period_start(day, mode)
+        return datetime.datetime(day.year, day.month, day.day)
+    return get_period_start(moment, mode)
@@ -0,0 +1,31 @@
+import datetime
+
+from khayyam import JalaliDate
+
+from .get_jalali_period_start import get_jalali_period_start
+
+
+def get_jalali_period_end(day, mode):
+    """
+    Returns the exclusive end of the Jalali period that contains the given day, which
+    is the first day of the following period.
+
+    Parameters:
+    - day (date): Any day within the period.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+    Returns:
+    - date (date): The Gregorian date of the first day of the next period.
+    """
+    start = get_jalali_period_start(day, mode)
+    if mode == "daily":
+        date = start + datetime.timedelta(days=1)
+    elif mode == "weekly":
+        date = start + datetime.timedelta(weeks=1)
+    else:
+        jalali_date = JalaliDate(start)
+        if jalali_date.month == 12:
+            date = JalaliDate(jalali_date.year + 1, 1, 1).todate()
+        else:
+            date = JalaliDate(jalali_date.year, jalali_date.month + 1, 1).todate()
+    return date
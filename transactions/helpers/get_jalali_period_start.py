@@ -0,0 +1,32 @@
+import datetime
+
+from khayyam import JalaliDate
+
+
+def get_jalali_period_start(day, mode):
+    """
+    Returns the first day of the Jalali period that contains the given day.
+
+    Jalali weeks start on Saturday and Jalali months on the first of the month.
+
+    Parameters:
+    - day (date): Any day within the period.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+    Returns:
+    - date (date): The Gregorian date of the first day of the period.
+
+    Raises:
+    - ValueError: If the mode is not one of 'daily', 'weekly', or 'monthly'.
+    """
+    if mode == "daily":
+        date = day
+    elif mode == "weekly":
+        # JalaliDate.weekday() counts from Saturday
+        date = day - datetime.timedelta(days=JalaliDate(day).weekday())
+    elif mode == "monthly":
+        jalali_date = JalaliDate(day)
+        date = JalaliDate(jalali_date.year, jalali_date.month, 1).todate()
+    else:
+        raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
+    return date
@@ -0,0 +1,24 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+
+def get_local_midnight(day):
+    """
+    Returns the moment the given day starts in the Jalali calendar time zone.
+
+    Parameters:
+    - day (date): The local day.
+
+    Returns:
+    - moment (datetime): The start of the day as a naive UTC datetime, comparable
+      with the stored `createdAt` values.
+    """
+    local_midnight = datetime.datetime(
+        day.year,
+        day.month,
+        day.day,
+        tzinfo=ZoneInfo(settings.JALALI_CALENDAR_TIME_ZONE),
+    )
+    return local_midnight.astimezone(datetime.timezone.utc).replace(tzinfo=None)
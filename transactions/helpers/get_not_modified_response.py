@@ -0,0 +1,51 @@
+import calendar
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def get_validators(version, moment=None):
+    """
+    Returns the validators of a response that only changes along with a version.
+
+    Parameters:
+    - version (str): Identifies the content of the response.
+    - moment (datetime): Optional. When the content last changed, as a naive UTC datetime.
+
+    Returns:
+    - tuple:
+        - etag (str): The weak entity tag; weak, since the content may be sent compressed.
+        - last_modified (int or None): The last modification as a timestamp.
+    """
+    last_modified = calendar.timegm(moment.utctimetuple()) if moment else None
+    return f'W/"{version}"', last_modified
+
+
+def patch_validators(response, etag, last_modified=None):
+    """
+    Sets the 'ETag' and 'Last-Modified' headers of the response.
+    """
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def get_not_modified_response(request, etag, last_modified=None):
+    """
+    Evaluates the conditional headers of the request against the validators.
+
+    Parameters:
+    - request (HttpRequest): The request being answered.
+    - etag (str): The entity tag of the current content, see `get_validators`.
+    - last_modified (int): Optional. The last modification of the content as a timestamp.
+
+    Returns:
+    - response (HttpResponse or None): The 304 Not Modified response carrying the
+      validators if the client's copy is current, 412 Precondition Failed if an
+      'If-Match' precondition fails, or None.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return patch_validators(response, etag, last_modified)
@@ -0,0 +1,37 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .get_jalali_period_end import get_jalali_period_end
+from .get_local_midnight import get_local_midnight
+from .get_period_end import get_period_end
+
+
+def get_page_end(first, mode, count, calendar="gregorian"):
+    """
+    Returns the exclusive end of a page of buckets, so the transactions matched for
+    the page can be bounded by it.
+
+    Parameters:
+    - first (datetime): Any moment within the first bucket of the page, as a naive UTC
+      datetime.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - count (int): The number of buckets of the page.
+    - calendar (str): Optional. 'gregorian' or 'jalali'.
+
+    Returns:
+    - end (datetime): The start of the bucket following the page, as a naive UTC
+      datetime comparable with the stored `createdAt` values.
+    """
+    if calendar == "jalali":
+        zone = ZoneInfo(settings.JALALI_CALENDAR_TIME_ZONE)
+        day = first.replace(tzinfo=datetime.timezone.utc).astimezone(zone).date()
+        for _ in range(count):
+            day = get_jalali_period_end(day, mode)
+        return get_local_midnight(day)
+
+    end = first
+    for _ in range(count):
+        end = get_period_end(end, mode)
+    return end
@@ -0,0 +1,25 @@
+import datetime
+
+from .get_period_start import get_period_start
+
+
+def get_period_end(moment, mode):
+    """
+    Returns the exclusive end of the period that contains the given moment, which is
+    the start of the following period.
+
+    Parameters:
+    - moment (datetime): Any point in time within the period.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+    Returns:
+    - date (datetime): The start date of the next period.
+    """
+    start = get_period_start(moment, mode)
+    if mode == "daily":
+        date = start + datetime.timedelta(days=1)
+    elif mode == "weekly":
+        date = start + datetime.timedelta(weeks=1)
+    else:
+        date = (start + datetime.timedelta(days=31)).replace(day=1)
+    return date
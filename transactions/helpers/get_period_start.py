@@ -0,0 +1,35 @@
+import datetime
+
+from .calendar_index import get_calendar_index
+
+
+def get_period_start(moment, mode):
+    """
+    Returns the start of the period that contains the given moment.
+
+    Parameters:
+    - moment (datetime): Any point in time within the period.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+    Returns:
+    - date (datetime): The start date of the period, matching
+      `construct_period_start_expression`.
+
+    Raises:
+    - ValueError: If the mode is not one of 'daily', 'weekly', or 'monthly'.
+    """
+    ordinal = get_calendar_index().get_period_start_ordinal(moment, mode)
+    if ordinal is not None:
+        return datetime.datetime.fromordinal(ordinal)
+
+    # Outside of the calendar index
+    day = datetime.datetime(moment.year, moment.month, moment.day)
+    if mode == "daily":
+        date = day
+    elif mode == "weekly":
+        date = day - datetime.timedelta(days=day.isoweekday() - 1)
+    elif mode == "monthly":
+        date = day.replace(day=1)
+    else:
+        raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
+    return date
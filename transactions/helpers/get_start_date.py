@@ -0,0 +1,29 @@
+import datetime
+
+
+def get_start_date(group_id, mode):
+    """
+    Returns the start date of the period based on the grouping mode.
+
+    Parameters:
+    - group_id (dict): The group identifier from the aggregation result.
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+
+    Returns:
+    - date (datetime): The start date of the period.
+
+    Raises:
+    - ValueError: If the mode is not one of 'daily', 'weekly', or 'monthly'.
+    """
+    if mode == "daily":
+        date = datetime.datetime(group_id["year"], group_id["month"], group_id["day"])
+    elif mode == "weekly":
+        monday = datetime.date.fromisocalendar(
+            group_id["isoYear"], group_id["isoWeek"], 1
+        )
+        date = datetime.datetime(monday.year, monday.month, monday.day)
+    elif mode == "monthly":
+        date = datetime.datetime(group_id["year"], group_id["month"], 1)
+    else:
+        raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
+    return date
@@ -0,0 +1,163 @@
+import datetime
+
+from transactions.models import Transaction
+
+from .build_jalali_boundaries import build_jalali_boundaries
+from .construct_history_cache_entry import construct_history_cache_entry
+from .construct_history_pipeline import construct_history_pipeline
+from .construct_jalali_bucket_pipeline import construct_jalali_bucket_pipeline
+from .format_group_id_to_date_key import format_group_id_to_date_key
+from .get_bucket_date import get_bucket_date
+from .get_page_end import get_page_end
+from .get_start_date import get_start_date
+
+
+def plan_created_at(query, direction=1):
+    """
+    Query plan of the `createdAt` of the first transaction matching a filter, see
+    `run_query_plan`.
+
+    Parameters:
+    - query (dict): The filter of the transactions.
+    - direction (int): Optional. 1 for the earliest transaction, -1 for the latest.
+
+    Returns:
+    - created_at (datetime or None): None if no transaction matches.
+    """
+    transaction = yield (
+        Transaction,
+        "find_one",
+        (query, {"_id": 0, "createdAt": 1}),
+        {"sort": [("createdAt", direction)]},
+    )
+    return transaction and transaction["createdAt"]
+
+
+def plan_jalali_pipeline(mode, match_stage, limit=None):
+    """
+    Query plan of the aggregation pipeline of the Jalali date buckets.
+
+    The bucket boundaries cover the requested range, or the matching transactions
+    when the range is open, and are applied with a single `$bucket` stage.
+
+    Parameters:
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - match_stage (dict): The filter applied to the transactions.
+    - limit (int): Optional. The maximum number of buckets to return.
+
+    Returns:
+    - pipeline (list or None): The stages, see `construct_jalali_bucket_pipeline`,
+      or None if no transaction can match.
+    """
+    created_at_range = match_stage.get("createdAt", {})
+    start = created_at_range.get("$gte")
+    end = created_at_range.get("$lt")
+
+    # Bound an open range by the matching transactions
+    if start is None or end is None:
+        query = {**match_stage, "createdAt": {**created_at_range, "$ne": None}}
+        if start is None:
+            start = yield from plan_created_at(query)
+            if start is None:
+                return None
+        if end is None:
+            latest = yield from plan_created_at(query, -1)
+            if latest is None:
+                return None
+            # createdAt is stored with millisecond precision
+            end = latest + datetime.timedelta(milliseconds=1)
+
+    if start >= end:
+        return None
+
+    boundaries, dates, labels = build_jalali_boundaries(mode, start, end)
+    return construct_jalali_bucket_pipeline(
+        match_stage, boundaries, dates, labels, limit
+    )
+
+
+def plan_history_rows(mode, calendar, match_stage, limit=None):
+    """
+    Query plan aggregating the matching transactions into date buckets.
+
+    Parameters:
+    - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+    - calendar (str): The calendar the buckets are aligned to, 'gregorian' or 'jalali'.
+    - match_stage (dict): The filter applied to the transactions.
+    - limit (int): Optional. The maximum number of buckets to return.
+
+    Returns:
+    - rows (list): One dict per bucket with its date 'key', start 'date' and both
+      the 'amount' and 'count' totals, sorted by date.
+    """
+    if calendar == "jalali":
+        pipeline = yield from plan_jalali_pipeline(mode, match_stage, limit)
+        if pipeline is None:
+            return []
+        return (yield (Transaction, "aggregate", (pipeline,), {}))
+
+    pipeline = construct_history_pipeline(mode, match_stage, limit)
+    results = yield (Transaction, "aggregate", (pipeline,), {})
+    return [
+        {
+            "key": format_group_id_to_date_key(result["_id"], mode),
+            "date": get_start_date(result["_id"], mode),
+            "amount": result["total_amount"],
+            "count": result["total_count"],
+        }
+        for result in results
+    ]
+
+
+def plan_history_page(params, match_stage):
+    """
+    Query plan aggregating the buckets of the requested page into a cache entry.
+
+    With a limit, the matched transactions are bounded to the page and one extra
+    bucket, which tells whether there is a next page, so the cost of a page does
+    not depend on the length of the history after it. When the page ends on
+    empty buckets, the next page starts at the next bucket with transactions.
+
+    Parameters:
+    - params (dict): The parsed query parameters, see `parse_stats_query_params`.
+    - match_stage (dict): The filter applied to the transactions.
+
+    Returns:
+    - entry (dict): The cache entry, see `construct_history_cache_entry`.
+    """
+    mode = params["mode"]
+    calendar = params["calendar"]
+    limit = params["limit"]
+    if limit is None:
+        rows = yield from plan_history_rows(mode, calendar, match_stage)
+        return construct_history_cache_entry(rows)
+
+    created_at_range = match_stage.get("createdAt", {})
+    first = params["start"]
+    if first is None:
+        first = yield from plan_created_at(
+            {**match_stage, "createdAt": {**created_at_range, "$ne": None}}
+        )
+        if first is None:
+            return construct_history_cache_entry([])
+
+    page_end = get_page_end(first, mode, limit + 1, calendar)
+    if params["end"] is not None and params["end"] <= page_end:
+        # The requested range ends within the page
+        rows = yield from plan_history_rows(mode, calendar, match_stage, limit + 1)
+        return construct_history_cache_entry(rows)
+
+    page_match_stage = {
+        **match_stage,
+        "createdAt": {**created_at_range, "$gte": first, "$lt": page_end},
+    }
+    rows = yield from plan_history_rows(mode, calendar, page_match_stage, limit + 1)
+    if len(rows) > limit:
+        return construct_history_cache_entry(rows)
+
+    next_created_at = yield from plan_created_at(
+        {**match_stage, "createdAt": {**created_at_range, "$gte": page_end}}
+    )
+    return construct_history_cache_entry(
+        rows, next_created_at and get_bucket_date(next_created_at, mode, calendar)
+    )
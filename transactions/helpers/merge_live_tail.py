@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from .format_group_id_to_date_key import format_group_id_to_date_key
+from .get_start_date import get_start_date
+
+
+def merge_live_tail(response_data, results, params):
+    """
+    Merges the live tail aggregation into the precomputed summaries.
+
+    Parameters:
+    - response_data (list): The summary rows, sorted by date; updated in place.
+    - results (iterable): The rows of the `construct_live_tail_pipeline` aggregation.
+    - params (dict): The parsed query parameters, see `parse_stats_query_params`.
+    """
+    stat_type = params["stat_type"]
+    mode = params["mode"]
+
+    # Live buckets either extend the bucket holding the watermark or follow it
+    rows = {row["key"]: row for row in response_data}
+    for result in results:
+        key = format_group_id_to_date_key(result["_id"], mode)
+        if stat_type == "amount":
+            value = Decimal(str(result["total_amount"]))
+        else:
+            value = result["total_count"]
+        if key in rows:
+            rows[key]["value"] += value
+        else:
+            rows[key] = {
+                "key": key,
+                "value": value,
+                "date": get_start_date(result["_id"], mode),
+            }
+            response_data.append(rows[key])
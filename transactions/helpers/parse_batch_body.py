@@ -0,0 +1,24 @@
+def parse_batch_body(data):
+    """
+    Validates the JSON body of a batch request and extracts its stats parameters.
+
+    Parameters:
+    - data (dict): The parsed request body.
+
+    Returns:
+    - query_params (dict): The 'type', 'mode', 'from', 'to' and 'calendar' of the
+      body, for `parse_stats_query_params`.
+
+    Raises:
+    - ValueError: With the message to return to the client if the body is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("The request body must be a JSON object")
+
+    query_params = {}
+    for name in ["type", "mode", "from", "to", "calendar"]:
+        value = data.get(name)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"Invalid {name} parameter")
+        query_params[name] = value
+    return query_params
@@ -0,0 +1,34 @@
+from bson import ObjectId
+from django.conf import settings
+
+
+def parse_merchant_ids(merchant_ids):
+    """
+    Validates and parses the list of merchant IDs of a batch request.
+
+    Parameters:
+    - merchant_ids (list): The ObjectId strings of the merchants.
+
+    Returns:
+    - merchant_obj_ids (list): The unique merchant ObjectIds, in request order.
+
+    Raises:
+    - ValueError: With the message to return to the client if the list is invalid.
+    """
+    if not isinstance(merchant_ids, list) or not merchant_ids:
+        raise ValueError("merchantIds must be a non-empty list")
+    if len(merchant_ids) > settings.TRANSACTION_STATS_MAX_BATCH_SIZE:
+        raise ValueError(
+            "merchantIds must not contain more than "
+            f"{settings.TRANSACTION_STATS_MAX_BATCH_SIZE} merchants"
+        )
+
+    merchant_obj_ids = []
+    for merchant_id in merchant_ids:
+        try:
+            merchant_obj_id = ObjectId(merchant_id)
+        except Exception:
+            raise ValueError(f"Invalid merchantId: {merchant_id}")
+        if merchant_obj_id not in merchant_obj_ids:
+            merchant_obj_ids.append(merchant_obj_id)
+    return merchant_obj_ids
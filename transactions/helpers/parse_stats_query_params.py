@@ -0,0 +1,116 @@
+import datetime
+
+from bson import ObjectId
+from django.conf import settings
+
+from .get_jalali_period_end import get_jalali_period_end
+from .get_jalali_period_start import get_jalali_period_start
+from .get_local_midnight import get_local_midnight
+from .get_period_end import get_period_end
+from .get_period_start import get_period_start
+
+
+def parse_date(value, name):
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid {name} parameter")
+
+
+def get_bucket_start(day, mode, calendar):
+    if calendar == "jalali":
+        return get_local_midnight(get_jalali_period_start(day.date(), mode))
+    return get_period_start(day, mode)
+
+
+def get_bucket_end(day, mode, calendar):
+    if calendar == "jalali":
+        return get_local_midnight(get_jalali_period_end(day.date(), mode))
+    return get_period_end(day, mode)
+
+
+def parse_stats_query_params(query_params, calendars=("gregorian",)):
+    """
+    Validates and parses the query parameters shared by the transaction stats endpoints.
+
+    Parameters:
+    - query_params (QueryDict): The request query parameters:
+        - type (str): Required. Either 'count' or 'amount'.
+        - mode (str): Required. One of 'daily', 'weekly', or 'monthly'.
+        - merchantId (str): Optional. The ObjectId of the merchant.
+        - from (str): Optional. First day to include, as YYYY-MM-DD.
+        - to (str): Optional. Last day to include, as YYYY-MM-DD.
+        - cursor (str): Optional. Start date of the first bucket to return, as YYYY-MM-DD.
+        - limit (int): Optional. Maximum number of buckets to return.
+        - calendar (str): Optional. The calendar the buckets are aligned to, one of
+          `calendars`; defaults to 'gregorian'.
+    - calendars (tuple): Optional. The calendars the endpoint supports.
+
+    Returns:
+    - params (dict): The parsed 'stat_type', 'mode', 'merchant_id' (ObjectId or None),
+      'start' and 'end' (datetime or None) bounding whole buckets as [start, end),
+      'limit' (int or None) and 'calendar'. Jalali buckets start at midnight in
+      `JALALI_CALENDAR_TIME_ZONE`, so their 'start' and 'end' are the naive UTC
+      moments of those midnights.
+
+    Raises:
+    - ValueError: With the message to return to the client if a parameter is invalid.
+    """
+    stat_type = query_params.get("type")
+    mode = query_params.get("mode")
+    merchant_id = query_params.get("merchantId")
+    calendar = query_params.get("calendar") or "gregorian"
+
+    if stat_type not in ["count", "amount"]:
+        raise ValueError("Invalid type parameter")
+    if mode not in ["daily", "weekly", "monthly"]:
+        raise ValueError("Invalid mode parameter")
+    if calendar not in calendars:
+        raise ValueError("Invalid calendar parameter")
+
+    merchant_obj_id = None
+    if merchant_id:
+        try:
+            merchant_obj_id = ObjectId(merchant_id)
+        except Exception:
+            raise ValueError("Invalid merchantId")
+
+    # Widen the range to whole buckets, so partial periods are never returned
+    start = end = None
+    if query_params.get("from"):
+        start = get_bucket_start(
+            parse_date(query_params["from"], "from"), mode, calendar
+        )
+    if query_params.get("to"):
+        end = get_bucket_end(parse_date(query_params["to"], "to"), mode, calendar)
+    if start is not None and end is not None and start >= end:
+        raise ValueError("The from parameter must not be after the to parameter")
+
+    # The cursor is the start of the next bucket, so pages continue from it
+    if query_params.get("cursor"):
+        cursor = get_bucket_start(
+            parse_date(query_params["cursor"], "cursor"), mode, calendar
+        )
+        start = cursor if start is None else max(start, cursor)
+
+    limit = None
+    if query_params.get("limit"):
+        try:
+            limit = int(query_params["limit"])
+        except ValueError:
+            raise ValueError("Invalid limit parameter")
+        if not 1 <= limit <= settings.TRANSACTION_STATS_MAX_PAGE_SIZE:
+            raise ValueError(
+                "The limit parameter must be between 1 and "
+                f"{settings.TRANSACTION_STATS_MAX_PAGE_SIZE}"
+            )
+
+    return {
+        "stat_type": stat_type,
+        "mode": mode,
+        "merchant_id": merchant_obj_id,
+        "start": start,
+        "end": end,
+        "limit": limit,
+        "calendar": calendar,
+    }
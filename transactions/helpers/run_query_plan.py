@@ -0,0 +1,60 @@
+import inspect
+
+from pymongo.asynchronous.command_cursor import AsyncCommandCursor
+from pymongo.asynchronous.cursor import AsyncCursor
+from pymongo.command_cursor import CommandCursor
+from pymongo.cursor import Cursor
+
+from transactions.models import get_async_collection
+
+
+def run_query_plan(plan):
+    """
+    Runs a query plan on the blocking MongoDB client of MongoEngine.
+
+    A query plan is a generator that yields the queries it needs as
+    (Document class, collection method, args, kwargs) tuples, receives the result of
+    every query, with cursors read into lists, and returns its own result. It leaves
+    the I/O to the function running it, so the sync and async views share it.
+
+    Parameters:
+    - plan (generator): The query plan.
+
+    Returns:
+    - result: The value returned by the plan.
+    """
+    try:
+        query = next(plan)
+        while True:
+            document, method, args, kwargs = query
+            result = getattr(document._get_collection(), method)(*args, **kwargs)
+            if isinstance(result, (Cursor, CommandCursor)):
+                result = list(result)
+            query = plan.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_query_plan_async(plan):
+    """
+    Runs a query plan on the async MongoDB client of the running event loop, see
+    `run_query_plan`.
+
+    Parameters:
+    - plan (generator): The query plan.
+
+    Returns:
+    - result: The value returned by the plan.
+    """
+    try:
+        query = next(plan)
+        while True:
+            document, method, args, kwargs = query
+            result = getattr(get_async_collection(document), method)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            if isinstance(result, (AsyncCursor, AsyncCommandCursor)):
+                result = await result.to_list()
+            query = plan.send(result)
+    except StopIteration as stop:
+        return stop.value
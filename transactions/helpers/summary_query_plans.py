@@ -0,0 +1,145 @@
+from datetime import datetime
+
+from django.conf import settings
+
+from transactions.models import (
+    RenderedSummary,
+    SummaryGenerationState,
+    Transaction,
+    TransactionSummary,
+)
+from transactions.models.summary_generation_state import TRANSACTION_SUMMARIES
+
+from .construct_live_tail_pipeline import construct_live_tail_pipeline
+from .merge_live_tail import merge_live_tail
+
+# Times the live summaries are read before giving up on a consistent live tail
+LIVE_READ_ATTEMPTS = 3
+
+
+def plan_generation_state():
+    """
+    Query plan of the state of the summary generation job, see `run_query_plan`.
+
+    Returns:
+    - state (dict): The 'generation', 'watermark' and 'updated_at' of the last run,
+      empty if the job never ran.
+    """
+    state = yield (
+        SummaryGenerationState,
+        "find_one",
+        (
+            {"name": TRANSACTION_SUMMARIES},
+            {"generation": 1, "watermark": 1, "updated_at": 1},
+        ),
+        {},
+    )
+    return state or {}
+
+
+def plan_rendered_content(params):
+    """
+    Query plan of the payload pre-rendered for the whole requested series.
+
+    Parameters:
+    - params (dict): The parsed query parameters, see `parse_stats_query_params`.
+
+    Returns:
+    - content (bytes or None): The gzip compressed JSON array, or None if the series
+      was not rendered yet.
+    """
+    rendered = yield (
+        RenderedSummary,
+        "find_one",
+        (
+            {
+                "mode": params["mode"],
+                "stat_type": params["stat_type"],
+                "merchantId": params["merchant_id"],
+            },
+            {"content": 1},
+        ),
+        {},
+    )
+    return rendered and rendered["content"]
+
+
+def plan_summary_rows(params, state=None):
+    """
+    Query plan reading the requested summaries, sorted by date, and merging the live
+    tail into the last page when a generation state is given.
+
+    A run completing between reading the state and the summaries folds into them
+    transactions the live tail would add again, so live summaries are read again
+    until the generation is the same before and after reading them.
+
+    Parameters:
+    - params (dict): The parsed query parameters, see `parse_stats_query_params`.
+    - state (dict): Optional. The generation state read for a live request, see
+      `plan_generation_state`.
+
+    Returns:
+    - tuple:
+        - rows (list): The 'key', 'value' and 'date' of every summary, with one extra
+          summary beyond the limit to know whether there is a next page.
+        - watermark (datetime or None): The watermark of the live tail merged into
+          the rows, or None if none was merged.
+    """
+    stat_type = params["stat_type"]
+    limit = params["limit"]
+
+    query = {
+        "mode": params["mode"],
+        # Query for overall summaries without a merchant
+        "merchantId": params["merchant_id"],
+    }
+    if params["start"] or params["end"]:
+        query["date"] = {}
+        if params["start"]:
+            query["date"]["$gte"] = params["start"]
+        if params["end"]:
+            query["date"]["$lt"] = params["end"]
+    # Every summary holds all stat types, so only the requested one is read
+    options = {"sort": [("date", 1)]}
+    if limit is not None:
+        options["limit"] = limit + 1
+
+    for _ in range(LIVE_READ_ATTEMPTS):
+        summaries = yield (
+            TransactionSummary,
+            "find",
+            (query, {"_id": 0, "key": 1, stat_type: 1, "date": 1}),
+            options,
+        )
+        if state is None or state.get("watermark") is None:
+            break
+        current_state = yield from plan_generation_state()
+        if current_state.get("generation", 0) == state.get("generation", 0):
+            break
+        state = current_state
+    else:
+        # Runs keep completing, so serve the summaries without the live tail
+        state = None
+
+    rows = [
+        {
+            "key": summary["key"],
+            # Decode values the way the Document field does
+            "value": TransactionSummary.get_stat_value(stat_type, summary[stat_type]),
+            "date": summary["date"],
+        }
+        for summary in summaries
+    ]
+
+    # The live tail extends the last page only
+    watermark = state and state.get("watermark")
+    if watermark is None or (limit is not None and len(rows) > limit):
+        return rows, None
+    # Skip the live tail when the summaries lag too far to aggregate it cheaply
+    if datetime.utcnow() - watermark > settings.TRANSACTION_SUMMARY_LIVE_MAX_LAG:
+        return rows, None
+
+    pipeline = construct_live_tail_pipeline(params, watermark)
+    results = yield (Transaction, "aggregate", (pipeline,), {})
+    merge_live_tail(rows, results, params)
+    return rows, watermark
@@ -0,0 +1,372 @@
+import datetime
+
+from bson import ObjectId
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.helpers import (
+    build_jalali_boundaries,
+    construct_history_pipeline,
+    construct_jalali_bucket_pipeline,
+    construct_live_tail_pipeline,
+    get_period_start,
+)
+from transactions.management.commands.generate_transaction_summaries import (
+    Command as GenerateTransactionSummariesCommand,
+)
+from transactions.models import RenderedSummary, Transaction, TransactionSummary
+
+MODES = ["daily", "weekly", "monthly"]
+
+
+def find_plan_problems(explain):
+    """
+    Walks the winning plans of an explain output for stages that do not scale.
+
+    Parameters:
+    - explain (dict): The output of the explain command, in any verbosity.
+
+    Returns:
+    - tuple:
+        - stages (list): The names of every stage of the winning plans.
+        - problems (list): The COLLSCAN stages and the SORT stages sorting documents
+          in memory. Sorts of grouped rows, above a GROUP stage, are expected.
+    """
+    stages, problems = [], []
+
+    def walk(node, winning):
+        # Returns whether the node contains a GROUP stage
+        if isinstance(node, list):
+            return any([walk(item, winning) for item in node])
+        if not isinstance(node, dict):
+            return False
+        has_group = False
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                has_group |= walk(value, winning or key == "winningPlan")
+        stage = node.get("stage") if winning else None
+        if not isinstance(stage, str):
+            return has_group
+        stages.append(stage)
+        if stage == "COLLSCAN" or (stage == "SORT" and not has_group):
+            problems.append(stage)
+        return has_group or stage == "GROUP"
+
+    walk(explain, False)
+    return stages, problems
+
+
+class Command(BaseCommand):
+    help = (
+        "Explains the queries and pipelines the stats endpoints and the summary "
+        "generation run, and fails if any plan scans a whole collection or sorts "
+        "documents in memory. Run it against a database with the indexes of the "
+        "ensure_indexes command; missing collections are reported as skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--merchant-id",
+            help="The merchant the queries filter on (defaults to any merchant found).",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Length of the date range the queries filter on, ending at the "
+            "newest transaction.",
+        )
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Print the stages of every winning plan.",
+        )
+
+    def handle(self, *args, **options):
+        if options["merchant_id"]:
+            if not ObjectId.is_valid(options["merchant_id"]):
+                raise CommandError("Invalid merchantId")
+            merchant_id = ObjectId(options["merchant_id"])
+        else:
+            transaction = (
+                Transaction.objects(merchantId__ne=None).only("merchantId").first()
+            )
+            merchant_id = transaction.merchantId if transaction else ObjectId()
+
+        latest = (
+            Transaction.objects(createdAt__ne=None)
+            .order_by("-createdAt")
+            .only("createdAt")
+            .first()
+        )
+        end = latest.createdAt if latest else datetime.datetime.utcnow()
+        start = get_period_start(
+            end - datetime.timedelta(days=options["days"]), "daily"
+        )
+
+        failed = []
+        for name, document, command in self.build_checks(merchant_id, start, end):
+            database = document._get_db()
+            if document._get_collection_name() not in database.list_collection_names():
+                self.stdout.write(self.style.WARNING(f"skipped {name}: no collection"))
+                continue
+            explain = database.command("explain", command, verbosity="queryPlanner")
+            stages, problems = find_plan_problems(explain)
+            if problems:
+                failed.append(name)
+                self.stdout.write(
+                    self.style.ERROR(f"FAILED {name}: {', '.join(problems)}")
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok {name}"))
+            if options["verbose"]:
+                self.stdout.write(f"    {' > '.join(reversed(stages))}")
+
+        if failed:
+            raise CommandError(
+                f"{len(failed)} query plans degraded: {', '.join(failed)}"
+            )
+
+    def build_checks(self, merchant_id, start, end):
+        """
+        Builds the commands to explain, as the endpoints and the summary generation
+        build them for the given merchant and date range.
+
+        Parameters:
+        - merchant_id (ObjectId): The merchant the queries filter on.
+        - start (datetime): Start of the date range, at midnight.
+        - end (datetime): Exclusive end of the date range.
+
+        Returns:
+        - checks (list): A (name, document, command) tuple per query, where the
+          command is an aggregate, find or distinct command on the document's collection.
+        """
+        transactions = Transaction._get_collection_name()
+        summaries = TransactionSummary._get_collection_name()
+        generate = GenerateTransactionSummariesCommand()
+        created_at_range = {"$gte": start, "$lt": end}
+        date_range = {"$gte": start, "$lte": end}
+
+        def aggregate(collection, pipeline):
+            return {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+
+        def find(collection, query, sort, limit=None):
+            command = {"find": collection, "filter": query, "sort": sort}
+            if limit is not None:
+                command["limit"] = limit
+            return command
+
+        checks = []
+
+        # Transaction history, per merchant, global and batched
+        for mode in MODES:
+            checks += [
+                (
+                    f"history {mode} by merchant",
+                    Transaction,
+                    aggregate(
+                        transactions,
+                        construct_history_pipeline(
+                            mode,
+                            {"merchantId": merchant_id, "createdAt": created_at_range},
+                            limit=100,
+                        ),
+                    ),
+                ),
+                (
+                    f"history {mode} by merchant without range",
+                    Transaction,
+                    aggregate(
+                        transactions,
+                        construct_history_pipeline(mode, {"merchantId": merchant_id}),
+                    ),
+                ),
+                (
+                    f"history {mode} global",
+                    Transaction,
+                    aggregate(
+                        transactions,
+                        construct_history_pipeline(
+                            mode, {"createdAt": created_at_range}
+                        ),
+                    ),
+                ),
+                (
+                    f"history jalali {mode} by merchant",
+                    Transaction,
+                    aggregate(
+                        transactions,
+                        construct_jalali_bucket_pipeline(
+                            {"merchantId": merchant_id},
+                            *build_jalali_boundaries(mode, start, end),
+                        ),
+                    ),
+                ),
+            ]
+        checks += [
+            (
+                "history batch",
+                Transaction,
+                aggregate(
+                    transactions,
+                    construct_history_pipeline(
+                        "daily",
+                        {
+                            "merchantId": {"$in": [merchant_id, ObjectId()]},
+                            "createdAt": created_at_range,
+                        },
+                        group_by_merchant=True,
+                    ),
+                ),
+            ),
+            (
+                "history jalali range bound",
+                Transaction,
+                find(
+                    transactions,
+                    {"merchantId": merchant_id, "createdAt": {"$ne": None}},
+                    {"createdAt": 1},
+                    limit=1,
+                ),
+            ),
+        ]
+
+        # Live tail of the summaries
+        for merchant in [merchant_id, None]:
+            params = {
+                "mode": "daily",
+                "merchant_id": merchant,
+                "start": None,
+                "end": None,
+            }
+            checks.append(
+                (
+                    f"summary live tail {'by merchant' if merchant else 'global'}",
+                    Transaction,
+                    aggregate(
+                        transactions, construct_live_tail_pipeline(params, start)
+                    ),
+                )
+            )
+
+        # Summaries, per merchant, global and batched
+        checks += [
+            (
+                "summary by merchant",
+                TransactionSummary,
+                find(
+                    summaries,
+                    {
+                        "mode": "daily",
+                        "merchantId": merchant_id,
+                        "date": created_at_range,
+                    },
+                    {"date": 1},
+                    limit=101,
+                ),
+            ),
+            (
+                "summary global",
+                TransactionSummary,
+                find(
+                    summaries,
+                    {"mode": "daily", "merchantId": None, "date": created_at_range},
+                    {"date": 1},
+                ),
+            ),
+            (
+                "summary batch",
+                TransactionSummary,
+                find(
+                    summaries,
+                    {
+                        "mode": "daily",
+                        "merchantId": {"$in": [merchant_id, ObjectId()]},
+                        "date": created_at_range,
+                    },
+                    {"merchantId": 1, "date": 1},
+                ),
+            ),
+            (
+                "summary rendered",
+                RenderedSummary,
+                find(
+                    RenderedSummary._get_collection_name(),
+                    {"mode": "daily", "stat_type": "amount", "merchantId": merchant_id},
+                    {},
+                    limit=1,
+                ),
+            ),
+            (
+                "daily report",
+                TransactionSummary,
+                find(
+                    summaries,
+                    {"mode": "daily", "date": start, "merchantId": {"$ne": None}},
+                    {},
+                ),
+            ),
+        ]
+
+        # Summary generation
+        checks += [
+            (
+                "generation watermark",
+                Transaction,
+                find(transactions, {"createdAt": {"$ne": None}}, {"createdAt": -1}, 1),
+            ),
+            (
+                "generation new transactions",
+                Transaction,
+                find(
+                    transactions,
+                    {"createdAt": {"$gt": start, "$lte": end}},
+                    {"createdAt": 1},
+                    1,
+                ),
+            ),
+            (
+                "generation daily scan",
+                Transaction,
+                aggregate(transactions, generate.construct_daily_pipeline(start, end)),
+            ),
+            (
+                "generation touched merchants",
+                Transaction,
+                {
+                    "distinct": transactions,
+                    "key": "merchantId",
+                    "query": {"createdAt": date_range},
+                },
+            ),
+            (
+                "generation rollup first day",
+                TransactionSummary,
+                find(summaries, {"mode": "daily", "date": date_range}, {"date": 1}, 1),
+            ),
+            (
+                "generation rendered series",
+                TransactionSummary,
+                find(
+                    summaries,
+                    {"merchantId": {"$in": [None, merchant_id]}},
+                    {"mode": 1, "merchantId": 1, "date": 1},
+                ),
+            ),
+        ]
+        for mode in ["weekly", "monthly"]:
+            for by_merchant in [True, False]:
+                checks.append(
+                    (
+                        f"generation rollup {mode} "
+                        f"{'by merchant' if by_merchant else 'global'}",
+                        TransactionSummary,
+                        aggregate(
+                            summaries,
+                            generate.construct_rollup_pipeline(
+                                mode, date_range, by_merchant
+                            ),
+                        ),
+                    )
+                )
+
+        return checks
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.models import (
+    RenderedSummary,
+    SummaryGenerationState,
+    Transaction,
+    TransactionSummary,
+)
+
+# Documents whose declared indexes are managed by this command
+INDEXED_DOCUMENTS = [
+    Transaction,
+    TransactionSummary,
+    RenderedSummary,
+    SummaryGenerationState,
+]
+
+
+def format_index(fields):
+    """
+    Formats the (field, direction) pairs of an index as 'field_1_other_-1'.
+    """
+    return "_".join(f"{field}_{direction}" for field, direction in fields)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the indexes declared by the transaction documents that are missing "
+        "from the database, and lists the undeclared ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report the missing indexes, failing if there are any.",
+        )
+
+    def handle(self, *args, **options):
+        missing_count = 0
+        for document in INDEXED_DOCUMENTS:
+            name = document._get_collection_name()
+            indexes = document.compare_indexes()
+
+            for fields in indexes["extra"]:
+                if fields != [("_id", 1)]:
+                    self.stdout.write(
+                        f"{name}: undeclared index {format_index(fields)}"
+                    )
+
+            if not indexes["missing"]:
+                self.stdout.write(self.style.SUCCESS(f"{name}: indexes up to date"))
+                continue
+            missing_count += len(indexes["missing"])
+            for fields in indexes["missing"]:
+                self.stdout.write(
+                    self.style.WARNING(f"{name}: missing index {format_index(fields)}")
+                )
+            if not options["check"]:
+                document.ensure_indexes()
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{name}: created {len(indexes['missing'])} indexes"
+                    )
+                )
+
+        if options["check"] and missing_count:
+            raise CommandError(f"{missing_count} declared indexes are missing")
@@ -0,0 +1,254 @@
+import datetime
+import itertools
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import django
+from bson import ObjectId
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.models import Transaction
+
+# Relative activity of every hour of the day in Tehran, busiest around noon and evening
+HOURLY_WEIGHTS = [
+    1, 1, 1, 1, 1, 1, 2, 4, 7, 10, 12, 13,
+    13, 12, 10, 9, 9, 10, 12, 13, 12, 9, 5, 2,
+]  # fmt: skip
+HOURLY_CUM_WEIGHTS = list(itertools.accumulate(HOURLY_WEIGHTS))
+
+# Offset of Tehran from UTC, which has no daylight saving time since 2022
+TEHRAN_UTC_OFFSET = datetime.timedelta(hours=3, minutes=30)
+
+
+@lru_cache(maxsize=1)
+def build_merchants(seed, count, exponent, sigma):
+    """
+    Builds the synthetic merchants of a seed.
+
+    Parameters:
+    - seed (int): The seed of the data set.
+    - count (int): The number of merchants.
+    - exponent (float): The Zipf exponent of the merchant activity.
+    - sigma (float): The spread of the typical amounts of the merchants.
+
+    Returns:
+    - tuple:
+        - merchant_ids (list): The ObjectId of every merchant, the most active first.
+        - cum_weights (list): The cumulative activity weights of the merchants.
+        - scales (list): The factor applied to the amounts of every merchant.
+    """
+    rng = random.Random(f"{seed}-merchants")
+    merchant_ids = [ObjectId(rng.randbytes(12)) for _ in range(count)]
+    cum_weights = list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1))
+    )
+    scales = [rng.lognormvariate(0, sigma) for _ in range(count)]
+    return merchant_ids, cum_weights, scales
+
+
+def insert_batch(index, size, options):
+    """
+    Generates and inserts one batch of transactions; runs inside a worker process when
+    the generation is parallel.
+
+    Every batch is generated from its own seed, so the data set does not depend on the
+    number of workers.
+
+    Parameters:
+    - index (int): The index of the batch.
+    - size (int): The number of transactions of the batch.
+    - options (dict): The generation options of the command, with the local 'start'
+      day of the history and its number of 'days'.
+
+    Returns:
+    - size (int): The number of inserted transactions.
+    """
+    merchant_ids, cum_weights, scales = build_merchants(
+        options["seed"],
+        options["merchants"],
+        options["zipf_exponent"],
+        options["merchant_amount_sigma"],
+    )
+    rng = random.Random(f"{options['seed']}-{index}")
+    start = options["start"] - TEHRAN_UTC_OFFSET
+    merchants = rng.choices(range(len(merchant_ids)), cum_weights=cum_weights, k=size)
+    hours = rng.choices(range(24), cum_weights=HOURLY_CUM_WEIGHTS, k=size)
+
+    median = options["amount_median"]
+    sigma = options["amount_sigma"]
+    documents = []
+    for merchant, hour in zip(merchants, hours):
+        # Amounts are whole thousands of Rials
+        amount = rng.lognormvariate(0, sigma) * median * scales[merchant]
+        created_at = start + datetime.timedelta(
+            days=rng.randrange(options["days"]),
+            hours=hour,
+            # createdAt is stored with millisecond precision
+            milliseconds=rng.randrange(3600000),
+        )
+        documents.append(
+            {
+                "merchantId": merchant_ids[merchant],
+                "amount": int(max(round(amount, -3), 1000)),
+                "createdAt": created_at,
+            }
+        )
+
+    Transaction._get_collection().insert_many(documents, ordered=False)
+    return size
+
+
+class Command(BaseCommand):
+    help = (
+        "Inserts synthetic transactions for load and scale testing: merchants with a "
+        "Zipf distributed activity over months of history, with log-normal amounts. "
+        "The same seed and sizes always generate the same transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=1000000,
+            help="Number of transactions to insert.",
+        )
+        parser.add_argument(
+            "--merchants", type=int, default=1000, help="Number of merchants."
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=12,
+            help="Number of calendar months of history, ending with the month of --end.",
+        )
+        parser.add_argument(
+            "--end",
+            help="The last day of the history, as YYYY-MM-DD (defaults to today).",
+        )
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=1.1,
+            help="Skew of the merchant activity; 0 spreads it evenly.",
+        )
+        parser.add_argument(
+            "--amount-median",
+            type=float,
+            default=500000,
+            help="Median transaction amount, in Rials.",
+        )
+        parser.add_argument(
+            "--amount-sigma",
+            type=float,
+            default=1.0,
+            help="Spread of the amounts of a merchant, as the log-normal sigma.",
+        )
+        parser.add_argument(
+            "--merchant-amount-sigma",
+            type=float,
+            default=0.8,
+            help="Spread of the typical amounts between merchants.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the generated data set."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of transactions per insert_many.",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of worker processes generating and inserting batches.",
+        )
+
+    def handle(self, *args, **options):
+        if options["transactions"] < 1 or options["merchants"] < 1:
+            raise CommandError("--transactions and --merchants must be positive")
+        if options["months"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--months and --batch-size must be positive")
+
+        if options["end"]:
+            try:
+                end = datetime.datetime.strptime(options["end"], "%Y-%m-%d")
+            except ValueError:
+                raise CommandError("Invalid end date format. Use YYYY-MM-DD.")
+        else:
+            end = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        # Start on the first day of the first month of the history
+        month = end.year * 12 + end.month - options["months"]
+        start = end.replace(year=month // 12, month=month % 12 + 1, day=1)
+        generation = {
+            name: options[name]
+            for name in [
+                "seed",
+                "merchants",
+                "zipf_exponent",
+                "amount_median",
+                "amount_sigma",
+                "merchant_amount_sigma",
+            ]
+        }
+        generation["start"] = start
+        generation["days"] = (end - start).days + 1
+
+        total = options["transactions"]
+        batch_size = options["batch_size"]
+        batches = [
+            (index, min(batch_size, total - offset))
+            for index, offset in enumerate(range(0, total, batch_size))
+        ]
+        self.stdout.write(
+            f"Inserting {total} transactions of {options['merchants']} merchants "
+            f"from {start:%Y-%m-%d} to {end:%Y-%m-%d} in {len(batches)} batches"
+        )
+
+        started = time.monotonic()
+        inserted = 0
+        if options["parallel"] > 1:
+            # Workers are spawned, not forked, so each opens its own MongoDB connections
+            with ProcessPoolExecutor(
+                max_workers=options["parallel"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            ) as executor:
+                sizes = executor.map(
+                    insert_batch,
+                    *zip(*batches),
+                    itertools.repeat(generation),
+                )
+                for size in sizes:
+                    inserted += size
+                    self.report_progress(inserted, total, started)
+        else:
+            for index, size in batches:
+                inserted += insert_batch(index, size, generation)
+                self.report_progress(inserted, total, started)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully inserted {inserted} transactions "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
+        self.stdout.write(
+            "Run ensure_indexes if the Transaction indexes do not exist yet, and "
+            "generate_transaction_summaries --full to summarize the new transactions."
+        )
+
+    def report_progress(self, inserted, total, started):
+        """
+        Writes the number of inserted transactions and the insert rate so far.
+        """
+        elapsed = time.monotonic() - started
+        rate = inserted / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Inserted {inserted}/{total} transactions "
+            f"({inserted / total:.0%}, {rate:,.0f}/s)"
+        )
@@ -1,117 +1,726 @@
 import datetime
+import gzip
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
 
+import django
 from bson import ObjectId
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from pymongo import UpdateOne
 
+from transactions.caching import history_cache
 from transactions.helpers import (
-    construct_aggregation_group_and_sort_fields,
-    format_group_id_to_date_key,
+    construct_period_start_expression,
+    get_calendar_index,
+    get_period_start,
 )
-from transactions.models import Transaction, TransactionSummary
+from transactions.models import (
+    RenderedSummary,
+    SummaryGenerationState,
+    Transaction,
+    TransactionSummary,
+)
+from transactions.serializers import transaction_encoder
+
+# Prefix of the staging collections; every scan stages in its own, so runs and
+# partitions running at the same time never overwrite each other's scan
+STAGING_COLLECTION = "transaction_summary_staging"
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
+# Modes built from the daily summaries instead of the Transaction collection
+ROLLUP_MODES = ["weekly", "monthly"]
+
+# Number of rendered summaries upserted per bulk write
+RENDER_BATCH_SIZE = 500
+
+
+def update_daily_partition(index, start, end):
+    """
+    Writes the daily summaries of one partition; runs inside a worker process.
+
+    Parameters:
+    - index (int): The index of the partition.
+    - start (datetime): Only transactions created at or after this are scanned.
+    - end (datetime): Only transactions created at or before this are scanned.
+
+    Returns:
+    - index (int): The index of the finished partition.
+    """
+    Command().update_daily_summaries(start, end)
+    return index
 
 
 class Command(BaseCommand):
-    help = "Updates the transaction summary data"
+    help = (
+        "Updates the transaction summary data. By default only the buckets touched by "
+        "transactions created after the last run's watermark are recomputed; pass "
+        "--full to rebuild every summary from scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild every summary from the whole Transaction collection.",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of worker processes scanning the Transaction collection.",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            help="Number of time range partitions to split the scan into "
+            "(defaults to --parallel).",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Only rerun the partitions that failed in the last parallel run.",
+        )
 
     def handle(self, *args, **options):
-        modes = ["daily", "weekly", "monthly"]
+        state = SummaryGenerationState.load()
+
+        if options["retry_failed"]:
+            if not state.failed_partitions:
+                self.stdout.write(self.style.SUCCESS("No failed partitions to retry"))
+                return
+            since = state.pending_since
+            new_watermark = state.pending_end
+            partitions = self.split_partitions(
+                state.pending_start, new_watermark, state.partition_count
+            )
+            indexes = list(state.failed_partitions)
+        else:
+            # Everything up to this point in time is covered by this run
+            new_watermark = self.get_latest_created_at()
+            if new_watermark is None:
+                self.stdout.write(self.style.WARNING("No transactions to summarize"))
+                return
+
+            if options["full"] or state.watermark is None:
+                since = None
+            else:
+                since = self.get_earliest_created_at_after(
+                    state.watermark, new_watermark
+                )
+                if since is None:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Summaries are up to date (watermark: {state.watermark})"
+                        )
+                    )
+                    return
+
+            partition_count = options["partitions"] or options["parallel"]
+            if partition_count > 1:
+                first = since or self.get_earliest_created_at()
+                partitions = self.split_partitions(
+                    get_period_start(first, "daily"),
+                    new_watermark,
+                    partition_count,
+                )
+                indexes = list(range(len(partitions)))
+            else:
+                partitions = None
+
+        if partitions is None:
+            self.update_transaction_summaries(since=since, end=new_watermark)
+        else:
+            # $merge requires the unique index its "on" fields refer to
+            TransactionSummary.ensure_indexes()
+
+            failed = self.update_daily_partitions(
+                partitions, indexes, options["parallel"]
+            )
+            if failed:
+                state.pending_since = since
+                state.pending_start = partitions[0][0]
+                state.pending_end = new_watermark
+                state.partition_count = len(partitions)
+                state.failed_partitions = failed
+                state.save()
+                raise CommandError(
+                    f"Partitions {failed} failed; rerun with --retry-failed "
+                    "to resume this run"
+                )
+
+            self.rollup_all_summaries(since=since, end=new_watermark)
+
+        generation = state.generation + 1
+        self.render_summaries(generation, since=since, end=new_watermark)
+
+        state.watermark = new_watermark
+        state.generation = generation
+        state.updated_at = datetime.datetime.utcnow()
+        state.pending_since = None
+        state.pending_start = None
+        state.pending_end = None
+        state.partition_count = None
+        state.failed_partitions = []
+        state.save()
+
+        # Cached history responses predate this run
+        if history_cache.generation_tier is None:
+            self.stderr.write(
+                self.style.WARNING(
+                    "Cached history responses are kept until their time to live "
+                    "expires; set TRANSACTION_CACHE_REDIS_URL to invalidate them"
+                )
+            )
+        else:
+            history_cache.invalidate()
+
+    def update_transaction_summaries(self, since=None, end=None):
+        """
+        Aggregates the Transaction collection once into daily summaries and rolls those
+        up into every coarser mode, both per merchant and globally. The rollups run
+        inside MongoDB and are written to the TransactionSummary collection with
+        `$merge`, so only the small global summaries pass through this process.
+
+        Parameters:
+        - since (datetime): Optional. The oldest new `createdAt`; only the buckets
+          containing it or later are recomputed.
+        - end (datetime): Optional. Only transactions created at or before this are scanned.
+        """
+        # $merge requires the unique index its "on" fields refer to
+        TransactionSummary.ensure_indexes()
+
+        # Recompute whole days so the upserted values stay exact
+        start = get_period_start(since, "daily") if since else None
+        self.update_daily_summaries(start, end)
+
+        self.rollup_all_summaries(since=since, end=end)
+
+    def rollup_all_summaries(self, since=None, end=None):
+        """
+        Rebuilds every coarser mode from the daily summaries.
+
+        Parameters:
+        - since (datetime): Optional. The oldest new `createdAt`; only the buckets
+          containing it or later are recomputed.
+        - end (datetime): Optional. Daily summaries after this are ignored.
+        """
+        for mode in ROLLUP_MODES:
+            # Coarser buckets are rebuilt from all of their daily summaries
+            start = get_period_start(since, mode) if since else None
+            self.rollup_summaries(mode, start, end)
+
+    def render_summaries(self, generation, since=None, end=None):
+        """
+        Renders the summary series of every merchant touched by the run into the
+        compressed JSON payloads the summary endpoint serves directly.
+
+        Parameters:
+        - generation (int): The generation of the run, stored with every payload.
+        - since (datetime): Optional. The oldest new `createdAt`; only the series of
+          merchants with transactions created since then are rendered. Every series
+          is rendered, and stale ones removed, if not given.
+        - end (datetime): Optional. The watermark of the run.
+        """
+        # The upserts rely on the unique index of the series
+        RenderedSummary.ensure_indexes()
+
+        query = {}
+        if since is not None:
+            created_at_range = {"$gte": since}
+            if end is not None:
+                created_at_range["$lte"] = end
+            merchant_ids = Transaction._get_collection().distinct(
+                "merchantId", {"createdAt": created_at_range}
+            )
+            # The overall summaries change with every transaction
+            query["merchantId"] = {"$in": [None, *merchant_ids]}
+
+        # Read the series in the order of the (mode, merchantId, date) index
+        summaries = (
+            TransactionSummary._get_collection()
+            .find(
+                query,
+                {
+                    "_id": 0,
+                    "mode": 1,
+                    "merchantId": 1,
+                    "key": 1,
+                    "amount": 1,
+                    "count": 1,
+                },
+            )
+            .sort([("mode", 1), ("merchantId", 1), ("date", 1)])
+        )
+
+        def get_series(summary):
+            return summary["mode"], summary.get("merchantId")
+
+        rendered_at = datetime.datetime.utcnow()
+        operations = []
+        count = 0
+        for (mode, merchant_id), rows in groupby(summaries, get_series):
+            rows = list(rows)
+            # Every document holds the series of both stat types
+            for stat_type in TransactionSummary.STAT_TYPES:
+                # Render the rows exactly as the summary endpoint does
+                response_data = [
+                    {
+                        "key": row["key"],
+                        "value": TransactionSummary.get_stat_value(
+                            stat_type, row[stat_type]
+                        ),
+                    }
+                    for row in rows
+                ]
+                operations.append(
+                    UpdateOne(
+                        {
+                            "mode": mode,
+                            "stat_type": stat_type,
+                            "merchantId": merchant_id,
+                        },
+                        {
+                            "$set": {
+                                "generation": generation,
+                                "content": gzip.compress(
+                                    transaction_encoder.encode(response_data)
+                                ),
+                                "rendered_at": rendered_at,
+                            }
+                        },
+                        upsert=True,
+                    )
+                )
+            if len(operations) >= RENDER_BATCH_SIZE:
+                RenderedSummary._get_collection().bulk_write(operations, ordered=False)
+                count += len(operations)
+                operations = []
+        if operations:
+            RenderedSummary._get_collection().bulk_write(operations, ordered=False)
+            count += len(operations)
+
+        if since is None:
+            # Series without summaries left were not rendered by this run
+            RenderedSummary.objects(generation__lt=generation).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully rendered {count} summary series (generation {generation})"
+            )
+        )
+
+    def update_daily_partitions(self, partitions, indexes, parallel):
+        """
+        Writes the daily summaries of the given partitions in a pool of worker processes.
+
+        Parameters:
+        - partitions (list): The (start, end) window of every partition of the run.
+        - indexes (list): Indexes of the partitions to run.
+        - parallel (int): The number of worker processes.
+
+        Returns:
+        - failed (list): Sorted indexes of the partitions that raised an error.
+        """
+        failed = []
+        # Workers are spawned, not forked, so each opens its own MongoDB connections
+        with ProcessPoolExecutor(
+            max_workers=max(parallel, 1),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            futures = {
+                executor.submit(
+                    update_daily_partition, index, *partitions[index]
+                ): index
+                for index in indexes
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                start, end = partitions[index]
+                try:
+                    future.result()
+                except Exception as error:
+                    failed.append(index)
+                    self.stderr.write(
+                        f"Partition {index} ({start} - {end}) failed: {error}"
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Successfully updated partition {index} ({start} - {end})"
+                        )
+                    )
+        return sorted(failed)
+
+    def split_partitions(self, start, end, count):
+        """
+        Splits the window [start, end] into day aligned partitions, so that no daily
+        summary is written by more than one partition.
+
+        Parameters:
+        - start (datetime): Start of the first partition, at midnight.
+        - end (datetime): Inclusive end of the last partition.
+        - count (int): The number of partitions to split into.
+
+        Returns:
+        - partitions (list): The inclusive (start, end) window of every partition.
+        """
+        days = (end - start).days + 1
+        count = max(1, min(count, days))
+        partitions = []
+        for index in range(count):
+            partition_start = start + datetime.timedelta(days=days * index // count)
+            if index == count - 1:
+                partition_end = end
+            else:
+                next_start = start + datetime.timedelta(
+                    days=days * (index + 1) // count
+                )
+                # createdAt is stored with millisecond precision
+                partition_end = next_start - datetime.timedelta(milliseconds=1)
+            partitions.append((partition_start, partition_end))
+        return partitions
+
+    def update_daily_summaries(self, start=None, end=None, staging_collection=None):
+        """
+        Scans the Transaction collection once and writes the daily summaries.
+
+        Parameters:
+        - start (datetime): Optional. Only transactions created at or after this are scanned.
+        - end (datetime): Optional. Only transactions created at or before this are scanned.
+        - staging_collection (str): Optional. The collection the scan is staged in;
+          defaults to a new collection named after `STAGING_COLLECTION`.
+        """
+        if staging_collection is None:
+            staging_collection = f"{STAGING_COLLECTION}_{ObjectId()}"
+
+        pipeline = self.construct_daily_pipeline(start, end)
+        Transaction._get_collection().aggregate(
+            pipeline + [{"$out": staging_collection}]
+        )
 
-        for mode in modes:
-            self.update_transaction_summary(mode, group_by_merchant=False)
-            self.update_transaction_summary(mode, group_by_merchant=True)
+        staging = Transaction._get_collection().database[staging_collection]
+        try:
+            bounds = list(
+                staging.aggregate(
+                    [
+                        {
+                            "$group": {
+                                "_id": None,
+                                "first": {"$min": "$_id.date"},
+                                "last": {"$max": "$_id.date"},
+                            }
+                        }
+                    ]
+                )
+            )
+            if bounds:
+                key_table = self.build_date_key_table(
+                    "daily", bounds[0]["first"], bounds[0]["last"]
+                )
+                for by_merchant in [True, False]:
+                    if by_merchant:
+                        # Transactions without a merchant only count towards the global summary
+                        pipeline = [{"$match": {"_id.merchantId": {"$ne": None}}}]
+                    else:
+                        pipeline = [
+                            {
+                                "$group": {
+                                    "_id": {"date": "$_id.date"},
+                                    "total_amount": {"$sum": "$total_amount"},
+                                    "total_count": {"$sum": "$total_count"},
+                                    "min_amount": {"$min": "$min_amount"},
+                                    "max_amount": {"$max": "$max_amount"},
+                                }
+                            }
+                        ]
+                    pipeline.extend(
+                        self.construct_summary_stages("daily", key_table, by_merchant)
+                    )
+                    self.write_summaries(staging, pipeline, "daily", by_merchant)
+            else:
+                self.stdout.write(self.style.WARNING("No daily summaries to update"))
+        finally:
+            # Also dropped when the run fails, as no later run reuses its name
+            staging.drop()
 
-    def update_transaction_summary(self, mode, group_by_merchant):
-        group_id, sort_fields = construct_aggregation_group_and_sort_fields(mode)
+    def construct_daily_pipeline(self, start=None, end=None):
+        """
+        Builds the pipeline of the single scan of the Transaction collection.
 
-        if group_by_merchant:
-            # Include merchantId in group_id
-            group_id["merchantId"] = "$merchantId"
+        Parameters:
+        - start (datetime): Optional. Only transactions created at or after this are scanned.
+        - end (datetime): Optional. Only transactions created at or before this are scanned.
+
+        Returns:
+        - pipeline (list): Stages grouping the transactions by (merchantId, day) with
+          their `total_amount`, `total_count`, `min_amount` and `max_amount`.
+        """
+        # Restrict the scan to the requested window of createdAt
+        created_at_range = {}
+        if start is not None:
+            created_at_range["$gte"] = start
+        if end is not None:
+            created_at_range["$lte"] = end
 
-        # Build the aggregation pipeline
         pipeline = [
             {
                 "$group": {
-                    "_id": group_id,
+                    "_id": {
+                        "merchantId": "$merchantId",
+                        "date": construct_period_start_expression("daily"),
+                    },
                     "total_amount": {"$sum": "$amount"},
                     "total_count": {"$sum": 1},
+                    "min_amount": {"$min": "$amount"},
+                    "max_amount": {"$max": "$amount"},
                 }
             },
         ]
+        if created_at_range:
+            pipeline.insert(0, {"$match": {"createdAt": created_at_range}})
+        return pipeline
 
-        # Perform the aggregation
-        results = Transaction.objects.aggregate(*pipeline)
+    def rollup_summaries(self, mode, start=None, end=None):
+        """
+        Builds the summaries of a coarser mode from the daily summaries, so the work
+        grows with the number of merchant-days instead of transactions.
 
-        # Prepare bulk operations for efficiency
-        bulk_ops = []
-        for result in results:
-            group_id = result["_id"]
-            merchant_id = group_id.get("merchantId")
-            if "merchantId" in group_id and merchant_id is None:
-                merchant_id = None  # Ensure merchantId is explicitly None
-            key = format_group_id_to_date_key(group_id, mode)
-            date = self.get_start_date(group_id, mode)
-
-            for stat_type in ["amount", "count"]:
-                value = (
-                    result["total_amount"]
-                    if stat_type == "amount"
-                    else result["total_count"]
-                )
+        Parameters:
+        - mode (str): The grouping mode to build, e.g. 'weekly' or 'monthly'.
+        - start (datetime): Optional. Start of the first bucket to rebuild.
+        - end (datetime): Optional. Daily summaries after this are ignored.
+        """
+        collection = TransactionSummary._get_collection()
+
+        date_range = {}
+        if start is not None:
+            date_range["$gte"] = start
+        if end is not None:
+            date_range["$lte"] = end
+
+        first = collection.find_one(
+            {"mode": "daily", **({"date": date_range} if date_range else {})},
+            sort=[("date", 1)],
+        )
+        if first is None:
+            self.stdout.write(self.style.WARNING(f"No summaries to update for {mode}"))
+            return
+        key_table = self.build_date_key_table(mode, first["date"], end or first["date"])
 
-                # Prepare the update operation
-                query = {
-                    "mode": mode,
-                    "stat_type": stat_type,
-                    "key": key,
-                    "merchantId": merchant_id,  # Always include merchantId, even if None
+        for by_merchant in [True, False]:
+            pipeline = self.construct_rollup_pipeline(mode, date_range, by_merchant)
+            pipeline.extend(self.construct_summary_stages(mode, key_table, by_merchant))
+            self.write_summaries(collection, pipeline, mode, by_merchant)
+
+    def construct_rollup_pipeline(self, mode, date_range, by_merchant):
+        """
+        Builds the pipeline grouping the daily summaries into the buckets of a coarser mode.
+
+        Parameters:
+        - mode (str): The grouping mode to build, e.g. 'weekly' or 'monthly'.
+        - date_range (dict): The filter applied to the date of the daily summaries.
+        - by_merchant (bool): Whether to group the per merchant or the global summaries.
+
+        Returns:
+        - pipeline (list): Stages grouping the daily summaries by (merchantId, date)
+          with their `total_amount`, `total_count`, `min_amount` and `max_amount`.
+        """
+        match_stage = {
+            "mode": "daily",
+            "merchantId": {"$ne": None} if by_merchant else None,
+        }
+        if date_range:
+            match_stage["date"] = date_range
+
+        return [
+            {"$match": match_stage},
+            {
+                "$group": {
+                    "_id": {
+                        "merchantId": "$merchantId",
+                        "date": construct_period_start_expression(mode, "$date"),
+                    },
+                    "total_amount": {"$sum": "$amount"},
+                    "total_count": {"$sum": "$count"},
+                    "min_amount": {"$min": "$min_amount"},
+                    "max_amount": {"$max": "$max_amount"},
                 }
+            },
+        ]
 
-                update = {
-                    "$set": {
-                        "value": value,
-                        "date": date,
-                    }
+    def construct_summary_stages(self, mode, key_table, by_merchant):
+        """
+        Builds the stages that turn grouped rows into TransactionSummary documents.
+
+        Parameters:
+        - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+        - key_table (tuple): The (first date, labels) table from `build_date_key_table`.
+        - by_merchant (bool): Whether the rows are per merchant or global.
+
+        Returns:
+        - stages (list): Stages mapping rows grouped by (merchantId, date) with their
+          `total_amount`, `total_count`, `min_amount` and `max_amount` to one
+          TransactionSummary document each.
+        """
+        first_date, labels = key_table
+        return [
+            {
+                "$project": {
+                    "_id": 0,
+                    "mode": {"$literal": mode},
+                    "merchantId": (
+                        "$_id.merchantId" if by_merchant else {"$literal": None}
+                    ),
+                    "key": {
+                        "$arrayElemAt": [
+                            {"$literal": labels},
+                            {
+                                "$toInt": {
+                                    "$divide": [
+                                        {"$subtract": ["$_id.date", first_date]},
+                                        MILLISECONDS_PER_DAY,
+                                    ]
+                                }
+                            },
+                        ]
+                    },
+                    "date": "$_id.date",
+                    "amount": "$total_amount",
+                    "count": "$total_count",
+                    "min_amount": "$min_amount",
+                    "max_amount": "$max_amount",
                 }
+            },
+        ]
 
-                bulk_ops.append(UpdateOne(query, update, upsert=True))
+    def write_summaries(self, collection, pipeline, mode, by_merchant):
+        """
+        Runs a summary pipeline and writes its output to the TransactionSummary
+        collection. Per merchant summaries are materialized inside MongoDB with
+        `$merge`; it cannot match on a null merchantId, so the few global rows take
+        the bulk_write path instead.
+
+        Parameters:
+        - collection (Collection): The collection the pipeline aggregates.
+        - pipeline (list): Stages producing TransactionSummary documents.
+        - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+        - by_merchant (bool): Whether the pipeline produces per merchant summaries.
+        """
+        if by_merchant:
+            collection.aggregate(
+                pipeline
+                + [
+                    {
+                        "$merge": {
+                            "into": TransactionSummary._get_collection_name(),
+                            "on": ["mode", "merchantId", "key"],
+                            "whenMatched": "merge",
+                            "whenNotMatched": "insert",
+                        }
+                    }
+                ]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successfully merged merchant summaries for mode: {mode}"
+                )
+            )
+            return
+
+        # Prepare bulk operations for efficiency
+        bulk_ops = []
+        for summary in collection.aggregate(pipeline):
+            query = {"mode": mode, "key": summary["key"], "merchantId": None}
+            update = {
+                "$set": {
+                    field: summary[field]
+                    for field in ["date", "amount", "count", "min_amount", "max_amount"]
+                }
+            }
+            bulk_ops.append(UpdateOne(query, update, upsert=True))
 
         if bulk_ops:
             # Perform bulk write operation
-            TransactionSummary._get_collection().bulk_write(bulk_ops)
+            TransactionSummary._get_collection().bulk_write(bulk_ops, ordered=False)
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Successfully updated {len(bulk_ops)} summaries for mode: {mode}, group_by_merchant: {group_by_merchant}"
+                    f"Successfully updated {len(bulk_ops)} global summaries for mode: {mode}"
                 )
             )
         else:
             self.stdout.write(
-                self.style.WARNING(
-                    f"No summaries to update for mode: {mode}, group_by_merchant: {group_by_merchant}"
-                )
+                self.style.WARNING(f"No global summaries to update for mode: {mode}")
             )
 
-    def get_start_date(self, group_id, mode):
+    def build_date_key_table(self, mode, first, last):
         """
-        Returns the start date of the period based on the grouping mode.
+        Builds the lookup table the summary pipelines use to label buckets, since the
+        Jalali date keys cannot be computed inside MongoDB.
 
         Parameters:
-        - group_id (dict): The group identifier from the aggregation result.
         - mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+        - first (datetime): The first day to label.
+        - last (datetime): The last day to label.
 
         Returns:
-        - date (datetime): The start date of the period.
+        - tuple:
+            - first_date (datetime): The date the table starts at.
+            - labels (list): The date key of the period starting on each day since
+              `first_date`, or None for days that do not start a period.
         """
-        if mode == "daily":
-            date = datetime.datetime(
-                group_id["year"], group_id["month"], group_id["day"]
-            )
-        elif mode == "weekly":
-            iso_year = group_id["isoYear"]
-            iso_week = group_id["isoWeek"]
-            date = datetime.datetime.strptime(f"{iso_year}-W{iso_week}-1", "%G-W%V-%u")
-        elif mode == "monthly":
-            date = datetime.datetime(group_id["year"], group_id["month"], 1)
-        else:
-            raise ValueError("Mode must be 'daily', 'weekly', or 'monthly'")
-        return date
+        calendar_index = get_calendar_index()
+        first_date = get_period_start(first, mode)
+        labels = []
+        date = first_date
+        while date <= last:
+            if get_period_start(date, mode) == date:
+                labels.append(calendar_index.get_key(date, mode))
+            else:
+                labels.append(None)
+            date += datetime.timedelta(days=1)
+        return first_date, labels
+
+    def get_latest_created_at(self):
+        """
+        Returns the newest `createdAt` in the Transaction collection, or None if it is empty.
+        """
+        latest = (
+            Transaction.objects(createdAt__ne=None)
+            .order_by("-createdAt")
+            .only("createdAt")
+            .first()
+        )
+        return latest.createdAt if latest else None
+
+    def get_earliest_created_at(self):
+        """
+        Returns the oldest `createdAt` in the Transaction collection, or None if it is empty.
+        """
+        earliest = (
+            Transaction.objects(createdAt__ne=None)
+            .order_by("createdAt")
+            .only("createdAt")
+            .first()
+        )
+        return earliest.createdAt if earliest else None
+
+    def get_earliest_created_at_after(self, watermark, end):
+        """
+        Returns the oldest `createdAt` in the half-open window (watermark, end].
+
+        Parameters:
+        - watermark (datetime): The watermark persisted by the previous run.
+        - end (datetime): The watermark of the current run.
+
+        Returns:
+        - date (datetime or None): The oldest new `createdAt`, or None if nothing is new.
+        """
+        earliest = (
+            Transaction.objects(createdAt__gt=watermark, createdAt__lte=end)
+            .order_by("createdAt")
+            .only("createdAt")
+            .first()
+        )
+        return earliest.createdAt if earliest else None
@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from transactions.models import TransactionSummary
+
+# Collection of the summaries of schema version 1, one document per stat type
+LEGACY_COLLECTION = "transaction_summary"
+
+
+class Command(BaseCommand):
+    help = (
+        "Migrates the transaction summaries of schema version 1, which stored one "
+        "document per stat type, into merged summary documents. Summaries already "
+        "present in the new collection are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drop-legacy",
+            action="store_true",
+            help="Drop the legacy summary collection once it is migrated.",
+        )
+
+    def handle(self, *args, **options):
+        database = TransactionSummary._get_db()
+        if LEGACY_COLLECTION not in database.list_collection_names():
+            self.stdout.write(self.style.WARNING("No legacy summaries to migrate"))
+            return
+        legacy = database[LEGACY_COLLECTION]
+
+        # $merge requires the unique index its "on" fields refer to
+        TransactionSummary.ensure_indexes()
+
+        for by_merchant in [True, False]:
+            pipeline = [
+                {"$match": {"merchantId": {"$ne": None} if by_merchant else None}},
+                {
+                    "$group": {
+                        "_id": {
+                            "mode": "$mode",
+                            "merchantId": "$merchantId",
+                            "key": "$key",
+                        },
+                        "date": {"$first": "$date"},
+                        "amount": {
+                            "$sum": {
+                                "$cond": [
+                                    {"$eq": ["$stat_type", "amount"]},
+                                    "$value",
+                                    0,
+                                ]
+                            }
+                        },
+                        "count": {
+                            "$sum": {
+                                "$cond": [{"$eq": ["$stat_type", "count"]}, "$value", 0]
+                            }
+                        },
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "mode": "$_id.mode",
+                        "merchantId": (
+                            "$_id.merchantId" if by_merchant else {"$literal": None}
+                        ),
+                        "key": "$_id.key",
+                        "date": 1,
+                        "amount": 1,
+                        # Counts were stored as decimals
+                        "count": {"$toInt": "$count"},
+                        "min_amount": {"$literal": None},
+                        "max_amount": {"$literal": None},
+                    }
+                },
+            ]
+            if by_merchant:
+                legacy.aggregate(
+                    pipeline
+                    + [
+                        {
+                            "$merge": {
+                                "into": TransactionSummary._get_collection_name(),
+                                "on": ["mode", "merchantId", "key"],
+                                "whenMatched": "keepExisting",
+                                "whenNotMatched": "insert",
+                            }
+                        }
+                    ]
+                )
+                continue
+
+            # $merge cannot match on a null merchantId
+            bulk_ops = [
+                UpdateOne(
+                    {
+                        "mode": summary["mode"],
+                        "key": summary["key"],
+                        "merchantId": None,
+                    },
+                    {"$setOnInsert": summary},
+                    upsert=True,
+                )
+                for summary in legacy.aggregate(pipeline)
+            ]
+            if bulk_ops:
+                TransactionSummary._get_collection().bulk_write(bulk_ops, ordered=False)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully migrated {legacy.estimated_document_count()} legacy "
+                f"summaries into {TransactionSummary.objects.count()} summaries"
+            )
+        )
+        self.stdout.write(
+            "Run generate_transaction_summaries --full to fill in the statistics "
+            "the legacy summaries did not hold."
+        )
+
+        if options["drop_legacy"]:
+            legacy.drop()
+            self.stdout.write(
+                self.style.SUCCESS(f"Dropped the {LEGACY_COLLECTION} collection")
+            )
@@ -0,0 +1,46 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.caching import history_cache
+
+
+class Command(BaseCommand):
+    help = "Shows the transaction history cache counters or invalidates the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            nargs="?",
+            default="stats",
+            choices=["stats", "invalidate", "reset-stats"],
+            help="'stats' prints the hit/miss counters, 'invalidate' drops every "
+            "cached response and 'reset-stats' zeroes the counters.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self.run_action(options["action"])
+        except ImproperlyConfigured as error:
+            raise CommandError(f"{error}; set TRANSACTION_CACHE_REDIS_URL")
+
+    def run_action(self, action):
+        if action == "invalidate":
+            history_cache.invalidate()
+            self.stdout.write(
+                self.style.SUCCESS("Invalidated the transaction history cache")
+            )
+        elif action == "reset-stats":
+            history_cache.reset_stats()
+            self.stdout.write(
+                self.style.SUCCESS("Reset the transaction history cache counters")
+            )
+        else:
+            stats = history_cache.stats()
+            hits = sum(
+                value for name, value in stats.items() if name.startswith("hits")
+            )
+            lookups = hits + stats["misses"]
+            for name, value in stats.items():
+                self.stdout.write(f"{name}: {value}")
+            if lookups:
+                self.stdout.write(f"hit ratio: {hits / lookups:.2%}")
@@ -1,2 +1,5 @@
+from .async_collections import close_async_client, get_async_collection
+from .rendered_summary import RenderedSummary
+from .summary_generation_state import SummaryGenerationState
 from .transactions import Transaction
 from .transactions_summary import TransactionSummary
@@ -0,0 +1,42 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+from pymongo import AsyncMongoClient
+
+# Async clients are bound to the event loop they were created on
+clients = weakref.WeakKeyDictionary()
+
+
+def get_async_collection(document):
+    """
+    Returns the collection of a MongoEngine Document on the async MongoDB client of
+    the running event loop, creating the client and its connection pool on first use.
+
+    Parameters:
+    - document (type): The Document class, e.g. `Transaction`.
+
+    Returns:
+    - collection (AsyncCollection): The collection the Document is stored in.
+    """
+    loop = asyncio.get_running_loop()
+    client = clients.get(loop)
+    if client is None:
+        client = clients[loop] = AsyncMongoClient(
+            settings.ASYNC_DB_CONNECTION_STRING,
+            maxPoolSize=settings.ASYNC_DB_MAX_POOL_SIZE,
+            event_listeners=settings.MONGO_EVENT_LISTENERS,
+        )
+    # MongoEngine falls back to the 'test' database as well
+    database = client.get_default_database("test")
+    return database[document._get_collection_name()]
+
+
+async def close_async_client():
+    """
+    Closes the async MongoDB client of the running event loop, if it has one, along
+    with its connection pool and monitors.
+    """
+    client = clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
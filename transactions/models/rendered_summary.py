@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import mongoengine as me
+
+
+class RenderedSummary(me.Document):
+    """
+    A MongoEngine Document class to store the pre-rendered response of a summary series.
+
+    Attributes:
+        mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
+        stat_type (str): The aggregation type, either 'count' or 'amount'.
+        merchantId (me.ObjectIdField): Optional. The merchant of the series, or None
+            for the overall summaries.
+        generation (int): The summary generation run that rendered the payload.
+        content (bytes): The gzip compressed JSON array the summary endpoint returns
+            for the whole series.
+        rendered_at (datetime): Timestamp of the rendering.
+    """
+
+    mode = me.StringField(required=True, choices=("daily", "weekly", "monthly"))
+    stat_type = me.StringField(required=True, choices=("count", "amount"))
+    merchantId = me.ObjectIdField(null=True, default=None)
+    generation = me.IntField(required=True)
+    content = me.BinaryField(required=True)
+    rendered_at = me.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        "collection": "rendered_summary",
+        "indexes": [
+            {"fields": ["mode", "stat_type", "merchantId"], "unique": True},
+            {"fields": ["generation"]},
+        ],
+    }
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import mongoengine as me
+
+# Name of the state document kept by the generate_transaction_summaries command
+TRANSACTION_SUMMARIES = "transaction_summaries"
+
+
+class SummaryGenerationState(me.Document):
+    """
+    A MongoEngine Document class to persist the progress of the summary generation job.
+
+    Attributes:
+        name (str): The unique name of the job the state belongs to.
+        watermark (datetime): The highest `createdAt` already folded into the summaries.
+        updated_at (datetime): Timestamp of the last successful run.
+        generation (int): The number of successful runs, versioning the rendered summaries.
+        pending_since (datetime): The oldest new `createdAt` of an unfinished parallel run,
+            or None if that run rebuilds everything.
+        pending_start (datetime): Start of the first partition of an unfinished parallel run.
+        pending_end (datetime): The watermark an unfinished parallel run summarizes up to.
+        partition_count (int): The number of partitions of an unfinished parallel run.
+        failed_partitions (list): Indexes of the partitions that still need to be retried.
+    """
+
+    name = me.StringField(required=True, unique=True)
+    watermark = me.DateTimeField()
+    updated_at = me.DateTimeField(default=datetime.utcnow)
+    generation = me.IntField(default=0)
+    pending_since = me.DateTimeField()
+    pending_start = me.DateTimeField()
+    pending_end = me.DateTimeField()
+    partition_count = me.IntField()
+    failed_partitions = me.ListField(me.IntField())
+
+    meta = {"collection": "summary_generation_state"}
+
+    @classmethod
+    def load(cls, name=TRANSACTION_SUMMARIES):
+        """
+        Returns the stored state of the given job, or a new unsaved one if it never ran.
+        """
+        return cls.objects(name=name).first() or cls(name=name)
@@ -20,8 +20,20 @@ class Transaction(me.Document):
 
     Notes:
         - This class is a direct representation of a MongoDB collection document.
+        - The indexes are not built on first use, as that is expensive on a large
+          collection; run the ensure_indexes command instead.
     """
 
     merchantId = me.ObjectIdField()
     amount = me.DecimalField()
     createdAt = me.DateTimeField()
+
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            # Per merchant history, live tail and first/last createdAt lookups
+            {"fields": ["merchantId", "createdAt"]},
+            # Global history, summary generation windows and watermarks
+            {"fields": ["createdAt"]},
+        ],
+    }
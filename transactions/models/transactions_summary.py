@@ -1,29 +1,76 @@
 import mongoengine as me
 
+# Version of the summary schema, stored in the collection name
+SUMMARY_SCHEMA_VERSION = 2
+
 
 class TransactionSummary(me.Document):
     """
-    A MongoEngine Document class to represent a transaction summary record.
+    A MongoEngine Document class to represent a transaction summary record, holding
+    every statistic of one bucket.
 
     Attributes:
         mode (str): The grouping mode, can be 'daily', 'weekly', or 'monthly'.
-        stat_type (str): The aggregation type, either 'count' or 'amount'.
         merchantId (me.ObjectIdField): Optional. The unique identifier for the merchant associated with the summary.
         key (str): The date key, formatted as per the mode.
-        value (Decimal): The aggregated amount or count.
         date (datetime): The start date of the period for sorting.
+        amount (Decimal): The total amount of the transactions.
+        count (int): The number of transactions.
+        min_amount (Decimal): Optional. The smallest transaction amount.
+        max_amount (Decimal): Optional. The largest transaction amount.
+
+    Notes:
+        - Summaries migrated from schema version 1, which stored one document per
+          stat type, have no min_amount and max_amount until they are regenerated.
     """
 
+    # Stat types served by the summary endpoints, each held by the field of its name
+    STAT_TYPES = ("amount", "count")
+
     mode = me.StringField(required=True, choices=("daily", "weekly", "monthly"))
-    stat_type = me.StringField(required=True, choices=("count", "amount"))
     merchantId = me.ObjectIdField(null=True, default=None)
     key = me.StringField(required=True)
-    value = me.DecimalField(required=True)
     date = me.DateTimeField(required=True)
+    amount = me.DecimalField(required=True)
+    count = me.IntField(required=True)
+    min_amount = me.DecimalField(null=True)
+    max_amount = me.DecimalField(null=True)
 
     meta = {
+        "collection": f"transaction_summary_v{SUMMARY_SCHEMA_VERSION}",
         "indexes": [
-            {"fields": ["mode", "stat_type", "merchantId", "key"], "unique": True},
-            {"fields": ["mode", "stat_type", "merchantId", "date"]},
-        ]
+            {"fields": ["mode", "merchantId", "key"], "unique": True},
+            {"fields": ["mode", "merchantId", "date"]},
+            # Daily summaries of every merchant by date, for rollups and daily reports
+            {"fields": ["mode", "date"]},
+        ],
     }
+
+    @property
+    def avg_amount(self):
+        """
+        The average transaction amount, or None for an empty bucket.
+        """
+        return self.amount / self.count if self.count else None
+
+    @classmethod
+    def get_stat_value(cls, stat_type, value):
+        """
+        Decodes the stored value of a stat type the way its Document field does, for
+        summaries read without building Documents.
+
+        Parameters:
+        - stat_type (str): The aggregation type, either 'count' or 'amount'.
+        - value: The raw stored value.
+
+        Returns:
+        - value (int or Decimal): The count as an integer or the amount as a Decimal.
+        """
+        return cls._fields[stat_type].to_python(value)
+
+    def get_value(self, stat_type):
+        """
+        Returns the value of a stat type, as a summary of schema version 1 of that
+        stat type held it.
+        """
+        return getattr(self, stat_type)
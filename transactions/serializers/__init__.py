@@ -1 +1 @@
-from .transaction import TransactionSerializer
+from .row_encoder import RowEncoder, transaction_encoder
@@ -0,0 +1,230 @@
+import json
+from decimal import Decimal
+from operator import itemgetter
+
+from bson.decimal128 import Decimal128
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_string(value):
+    return json.encoder.encode_basestring(value)
+
+
+def encode_number(value):
+    if not value.is_finite():
+        raise ValueError(f"Cannot encode {value} as JSON")
+    # str() of a Decimal keeps every digit and is a valid JSON number
+    return str(value)
+
+
+def encode_float(value):
+    if value != value or value in (float("inf"), float("-inf")):
+        raise ValueError(f"Cannot encode {value} as JSON")
+    return float.__repr__(value)
+
+
+def encode_decimal128(value):
+    return encode_number(value.to_decimal())
+
+
+VALUE_ENCODERS = {
+    str: encode_string,
+    bool: lambda value: "true" if value else "false",
+    int: int.__repr__,
+    float: encode_float,
+    Decimal: encode_number,
+    Decimal128: encode_decimal128,
+    type(None): lambda value: "null",
+}
+
+
+def get_encoder(value_type):
+    """
+    Returns the encoder of a type that has none of its own, such as the bson Int64 of
+    sums that overflow int32, by its first base type in `VALUE_ENCODERS`.
+
+    Raises:
+    - TypeError: If the type is not a subclass of any encodable type.
+    """
+    for base_type, encoder in list(VALUE_ENCODERS.items()):
+        if issubclass(value_type, base_type):
+            # Later values of the type are encoded without the lookup
+            VALUE_ENCODERS[value_type] = encoder
+            return encoder
+    raise TypeError(f"Cannot encode {value_type.__name__} as JSON")
+
+
+def encode_value(value):
+    encoder = VALUE_ENCODERS.get(type(value))
+    if encoder is None:
+        encoder = get_encoder(type(value))
+    return encoder(value)
+
+
+# Bounds of the integers orjson encodes natively; it raises a TypeError for wider ones
+ORJSON_MIN_INTEGER = -(2**63)
+ORJSON_MAX_INTEGER = 2**64 - 1
+
+
+def convert_value(value):
+    """
+    Prepares a value for orjson, so it is encoded as the stdlib backend encodes it:
+    non-finite numbers are rejected rather than written as null, and decimals and
+    integers wider than 64 bits are embedded as raw fragments.
+    """
+    if isinstance(value, float):
+        encode_float(value)
+    elif isinstance(value, int) and not (
+        ORJSON_MIN_INTEGER <= value <= ORJSON_MAX_INTEGER
+    ):
+        return orjson.Fragment(int.__repr__(value).encode())
+    elif isinstance(value, Decimal):
+        return orjson.Fragment(encode_number(value).encode())
+    elif isinstance(value, Decimal128):
+        return orjson.Fragment(encode_decimal128(value).encode())
+    return value
+
+
+class RowEncoder:
+    """
+    Encodes lists of flat rows straight into JSON bytes, bypassing DRF serializers.
+
+    The object template of a row is compiled once from the field names, so encoding a
+    row only formats its values into it. Decimal and bson Decimal128 values are
+    written as JSON numbers with all their digits, and subclasses of the encodable
+    types, such as the bson Int64 of large sums, as their base type. When orjson is
+    installed it can be used as the backend, with Decimal values and integers wider
+    than 64 bits embedded as raw fragments, so both backends encode the same rows
+    into the same JSON.
+
+    Attributes:
+    ----------
+    fields : list
+        Names of the row fields to encode, in output order.
+    backend : str
+        'stdlib' or 'orjson'.
+    """
+
+    def __init__(self, fields, backend="auto"):
+        self.fields = list(fields)
+        if backend == "auto":
+            backend = "orjson" if orjson is not None else "stdlib"
+        if backend not in ["stdlib", "orjson"]:
+            raise ImproperlyConfigured(f"Unknown JSON backend: {backend}")
+        if backend == "orjson" and orjson is None:
+            raise ImproperlyConfigured("The orjson JSON backend is not installed")
+        self.backend = backend
+
+        # Build the row template, e.g. {"key":%s,"value":%s}
+        self.template = (
+            "{" + ",".join(f"{encode_string(field)}:%s" for field in self.fields) + "}"
+        )
+        self.get_values = itemgetter(*self.fields)
+        if len(self.fields) == 1:
+            get_value = self.get_values
+            self.get_values = lambda row: (get_value(row),)
+
+    def encode(self, rows):
+        """
+        Encodes the rows into a JSON array.
+
+        Parameters:
+        - rows (list): The rows as dicts; fields missing from `fields` are ignored.
+
+        Returns:
+        - content (bytes): The UTF-8 encoded JSON array.
+        """
+        if self.backend == "orjson":
+            return orjson.dumps([self.convert_row(row) for row in rows])
+        return self.encode_text(rows).encode()
+
+    def encode_mapping(self, mapping):
+        """
+        Encodes a mapping of row lists into a JSON object of JSON arrays.
+
+        Parameters:
+        - mapping (dict): The row lists by key; keys are converted with str().
+
+        Returns:
+        - content (bytes): The UTF-8 encoded JSON object.
+        """
+        if self.backend == "orjson":
+            return orjson.dumps(
+                {
+                    str(key): [self.convert_row(row) for row in rows]
+                    for key, rows in mapping.items()
+                },
+            )
+        return (
+            "{"
+            + ",".join(
+                f"{encode_string(str(key))}:{self.encode_text(rows)}"
+                for key, rows in mapping.items()
+            )
+            + "}"
+        ).encode()
+
+    def iter_encode(self, rows, lines=False, chunk_size=100):
+        """
+        Encodes the rows incrementally, so they can be streamed while they are read.
+
+        Parameters:
+        - rows (iterable): The rows as dicts, consumed lazily.
+        - lines (bool): Optional. Whether to encode newline delimited JSON rather than
+          a JSON array.
+        - chunk_size (int): Optional. The number of rows encoded into every chunk.
+
+        Yields:
+        - chunk (bytes): The next UTF-8 encoded part of the document.
+        """
+        separator = b"\n" if lines else b","
+        if not lines:
+            yield b"["
+        chunk = []
+        first_chunk = True
+        for row in rows:
+            chunk.append(self.encode_row(row))
+            if len(chunk) == chunk_size:
+                yield self.join_chunk(chunk, separator, lines, first_chunk)
+                chunk = []
+                first_chunk = False
+        if chunk:
+            yield self.join_chunk(chunk, separator, lines, first_chunk)
+        if not lines:
+            yield b"]"
+
+    def join_chunk(self, chunk, separator, lines, first_chunk):
+        content = separator.join(chunk)
+        if lines:
+            return content + separator
+        return content if first_chunk else separator + content
+
+    def encode_row(self, row):
+        if self.backend == "orjson":
+            return orjson.dumps(self.convert_row(row))
+        return (self.template % tuple(map(encode_value, self.get_values(row)))).encode()
+
+    def convert_row(self, row):
+        return dict(zip(self.fields, map(convert_value, self.get_values(row))))
+
+    def encode_text(self, rows):
+        template = self.template
+        get_values = self.get_values
+        return (
+            "["
+            + ",".join(
+                template % tuple(map(encode_value, get_values(row))) for row in rows
+            )
+            + "]"
+        )
+
+
+transaction_encoder = RowEncoder(
+    ["key", "value"], backend=settings.TRANSACTION_STATS_JSON_BACKEND
+)
@@ -1,6 +0,0 @@
-from rest_framework import serializers
-
-
-class TransactionSerializer(serializers.Serializer):
-    key = serializers.CharField()
-    value = serializers.IntegerField()
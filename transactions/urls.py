@@ -1,6 +1,13 @@
 from django.urls import path
 
-from .views import TransactionHistoryView, TransactionSummaryView
+from .views import (
+    AsyncTransactionHistoryView,
+    AsyncTransactionSummaryView,
+    TransactionHistoryBatchView,
+    TransactionHistoryView,
+    TransactionSummaryBatchView,
+    TransactionSummaryView,
+)
 
 urlpatterns = [
     path(
@@ -8,9 +15,29 @@ urlpatterns = [
         TransactionHistoryView.as_view(),
         name="transaction-history",
     ),
+    path(
+        "transaction-history/async/",
+        AsyncTransactionHistoryView.as_view(),
+        name="transaction-history-async",
+    ),
+    path(
+        "transaction-history/batch/",
+        TransactionHistoryBatchView.as_view(),
+        name="transaction-history-batch",
+    ),
     path(
         "transaction-summary/",
         TransactionSummaryView.as_view(),
         name="transaction-summary",
     ),
+    path(
+        "transaction-summary/async/",
+        AsyncTransactionSummaryView.as_view(),
+        name="transaction-summary-async",
+    ),
+    path(
+        "transaction-summary/batch/",
+        TransactionSummaryBatchView.as_view(),
+        name="transaction-summary-batch",
+    ),
 ]
@@ -1,2 +1,6 @@
 from .transaction_history import TransactionHistoryView
+from .transaction_history_async import AsyncTransactionHistoryView
+from .transaction_history_batch import TransactionHistoryBatchView
 from .transactions_summary import TransactionSummaryView
+from .transactions_summary_async import AsyncTransactionSummaryView
+from .transactions_summary_batch import TransactionSummaryBatchView
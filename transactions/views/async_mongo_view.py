@@ -0,0 +1,22 @@
+from django.core.handlers.wsgi import WSGIRequest
+from django.views import View
+
+from transactions.models import close_async_client
+
+
+class AsyncMongoView(View):
+    """
+    Base of the async views querying MongoDB through `get_async_collection`.
+
+    Under ASGI the event loop, and so its client and connection pool, serves every
+    request of the worker. Under WSGI every request runs on a new event loop that is
+    discarded afterwards, so its client is closed at the end of the request instead
+    of leaking its connection pool and monitors.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            if isinstance(request, WSGIRequest):
+                await close_async_client()
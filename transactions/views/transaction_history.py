@@ -1,14 +1,24 @@
-from bson import ObjectId
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
+from transactions.caching import history_cache
 from transactions.helpers import (
-    construct_aggregation_group_and_sort_fields,
+    construct_history_pipeline,
     format_group_id_to_date_key,
+    get_not_modified_response,
+    get_validators,
+    parse_stats_query_params,
+    patch_validators,
+    plan_history_page,
+    plan_jalali_pipeline,
+    run_query_plan,
 )
 from transactions.models import Transaction
-from transactions.serializers import TransactionSerializer
+from transactions.serializers import transaction_encoder
 
 
 class TransactionHistoryView(APIView):
@@ -23,72 +33,157 @@ class TransactionHistoryView(APIView):
     - type (str): Required. Specifies the aggregation type, either 'count' or 'amount'.
     - mode (str): Required. Specifies the grouping interval, one of 'daily', 'weekly', or 'monthly'.
     - merchantId (str): Optional. The ObjectId of the merchant to filter transactions.
+    - from (str): Optional. The first day to include, as YYYY-MM-DD.
+    - to (str): Optional. The last day to include, as YYYY-MM-DD.
+    - limit (int): Optional. The maximum number of buckets to return.
+    - cursor (str): Optional. The cursor of the page to return, from the 'next' link.
+    - calendar (str): Optional. 'gregorian' (default) groups by Gregorian day, ISO week
+      and Gregorian month in UTC. 'jalali' groups by Jalali day, week (starting on
+      Saturday) and month in `JALALI_CALENDAR_TIME_ZONE`.
+    - stream (str): Optional. 'json' streams the buckets as a JSON array and 'ndjson'
+      as newline delimited JSON, while they are aggregated. Streamed responses are
+      not cached and cannot be combined with 'limit'.
+
+    The range is widened to whole buckets, so every bucket overlapping it is returned
+    complete. When more buckets are available than 'limit', the response carries a
+    'Link' header pointing at the next page.
 
     Responses:
     - 200 OK: A list of aggregated transaction data with 'key' as the date grouping and 'value' as the aggregated amount or count.
     - 400 Bad Request: Returned when invalid query parameters are provided.
 
+    Responses are cached per (mode, merchantId) and range for a mode specific time to
+    live, see `TRANSACTION_HISTORY_CACHE`. Cached responses carry an 'ETag' of the
+    content of their cache entry, and conditional requests matching it are answered
+    with 304 Not Modified.
     """
 
     def get(self, request):
-        stat_type = request.query_params.get("type")
-        mode = request.query_params.get("mode")
-        merchant_id = request.query_params.get("merchantId")
+        stream = request.query_params.get("stream")
 
         # Validate inputs
-        if stat_type not in ["count", "amount"]:
+        try:
+            params = parse_stats_query_params(
+                request.query_params, calendars=("gregorian", "jalali")
+            )
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        if stream not in [None, "json", "ndjson"]:
             return Response(
-                {"error": "Invalid type parameter"}, status=status.HTTP_400_BAD_REQUEST
+                {"error": "Invalid stream parameter"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        if mode not in ["daily", "weekly", "monthly"]:
+        if stream and params["limit"] is not None:
             return Response(
-                {"error": "Invalid mode parameter"}, status=status.HTTP_400_BAD_REQUEST
+                {"error": "The stream parameter cannot be combined with limit"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        stat_type = params["stat_type"]
+        mode = params["mode"]
+        limit = params["limit"]
 
         # Build the match stage
         match_stage = {}
-        if merchant_id:
-            try:
-                merchant_obj_id = ObjectId(merchant_id)
-                match_stage["merchantId"] = merchant_obj_id
-            except Exception:
-                return Response(
-                    {"error": "Invalid merchantId"}, status=status.HTTP_400_BAD_REQUEST
-                )
-
-        # Get group and sort criteria
-        group_id, sort_fields = construct_aggregation_group_and_sort_fields(mode)
-
-        # Build the sort stage
-        sort_stage = {"$sort": dict(sort_fields)}
-
-        # Define the aggregation pipeline
-        pipeline = [
-            {"$match": match_stage},
-            {
-                "$group": {
-                    "_id": group_id,
-                    "total_amount": {"$sum": "$amount"},
-                    "total_count": {"$sum": 1},
-                }
-            },
-            sort_stage,
-        ]
-
-        # Perform the aggregation
-        results = list(Transaction.objects.aggregate(*pipeline))
+        if params["merchant_id"]:
+            match_stage["merchantId"] = params["merchant_id"]
+        if params["start"] or params["end"]:
+            match_stage["createdAt"] = {}
+            if params["start"]:
+                match_stage["createdAt"]["$gte"] = params["start"]
+            if params["end"]:
+                match_stage["createdAt"]["$lt"] = params["end"]
+
+        if stream:
+            # Rows are encoded as they come out of the cursor, so nothing is buffered
+            return StreamingHttpResponse(
+                transaction_encoder.iter_encode(
+                    self.stream_rows(params, match_stage), lines=stream == "ndjson"
+                ),
+                content_type=(
+                    "application/x-ndjson" if stream == "ndjson" else "application/json"
+                ),
+                status=status.HTTP_200_OK,
+            )
 
-        # Prepare the response data
-        response_data = []
-        for result in results:
-            key = format_group_id_to_date_key(result["_id"], mode)
-            value = (
-                result["total_amount"]
-                if stat_type == "amount"
-                else result["total_count"]
+        # Both stat types come out of the same aggregation, so cache them together
+        cache_params = (
+            params["calendar"],
+            params["merchant_id"],
+            params["start"] and params["start"].date(),
+            params["end"] and params["end"].date(),
+            limit,
+        )
+        # Concurrent identical requests wait for a single aggregation
+        entry = history_cache.get_or_set(
+            mode,
+            cache_params,
+            lambda: run_query_plan(plan_history_page(params, match_stage)),
+        )
+
+        # Clients holding the content of the cached entry do not need it again
+        # The digest survives recomputing the entry, unlike its time, so it is the only
+        # validator
+        validators = get_validators(f"history-{entry['digest']}")
+        not_modified = get_not_modified_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        rows = entry["rows"]
+
+        headers = {}
+        next_date = entry.get("next_date")
+        if limit is not None and len(rows) > limit:
+            next_date = rows[limit]["date"]
+            rows = rows[:limit]
+        if next_date is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                next_date.strftime("%Y-%m-%d"),
             )
-            response_data.append({"key": key, "value": value})
+            headers["Link"] = f'<{next_url}>; rel="next"'
 
-        # Use the serializer to serialize the response data
-        serializer = TransactionSerializer(response_data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Prepare the response data
+        response_data = [{"key": row["key"], "value": row[stat_type]} for row in rows]
+
+        # Encode the rows straight into JSON
+        response = HttpResponse(
+            transaction_encoder.encode(response_data),
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+            headers=headers,
+        )
+        return patch_validators(response, *validators)
+
+    def stream_rows(self, params, match_stage):
+        """
+        Aggregates the matching transactions into date buckets lazily, reading the
+        cursor in batches of `TRANSACTION_HISTORY_STREAM_BATCH_SIZE` buckets.
+
+        Parameters:
+        - params (dict): The parsed query parameters, see `parse_stats_query_params`.
+        - match_stage (dict): The filter applied to the transactions.
+
+        Yields:
+        - row (dict): The date 'key' and 'value' of every bucket, sorted by date.
+        """
+        stat_type = params["stat_type"]
+        mode = params["mode"]
+        batch_size = settings.TRANSACTION_HISTORY_STREAM_BATCH_SIZE
+
+        if params["calendar"] == "jalali":
+            pipeline = run_query_plan(plan_jalali_pipeline(mode, match_stage))
+            if pipeline is None:
+                return
+            for result in Transaction.objects.aggregate(
+                *pipeline, batchSize=batch_size
+            ):
+                yield {"key": result["key"], "value": result[stat_type]}
+            return
+
+        pipeline = construct_history_pipeline(mode, match_stage)
+        total_field = f"total_{stat_type}"
+        for result in Transaction.objects.aggregate(*pipeline, batchSize=batch_size):
+            yield {
+                "key": format_group_id_to_date_key(result["_id"], mode),
+                "value": result[total_field],
+            }
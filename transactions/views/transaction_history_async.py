@@ -0,0 +1,106 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse, JsonResponse
+from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
+
+from transactions.caching import history_cache
+from transactions.helpers import (
+    get_not_modified_response,
+    get_validators,
+    parse_stats_query_params,
+    patch_validators,
+    plan_history_page,
+    run_query_plan_async,
+)
+from transactions.serializers import transaction_encoder
+
+from .async_mongo_view import AsyncMongoView
+
+
+class AsyncTransactionHistoryView(AsyncMongoView):
+    """
+    Async view to retrieve aggregated transaction statistics based on type and mode.
+
+    Serves the same query parameters and responses as `TransactionHistoryView`, except
+    for 'stream', but runs the aggregation through the async MongoDB driver. Under
+    ASGI, a worker keeps serving other requests while aggregations are running.
+
+    Responses share the cache of `TransactionHistoryView`, and concurrent misses are
+    coalesced with its requests into a single aggregation.
+    """
+
+    async def get(self, request):
+        # Validate inputs
+        try:
+            params = parse_stats_query_params(
+                request.GET, calendars=("gregorian", "jalali")
+            )
+        except ValueError as error:
+            return JsonResponse(
+                {"error": str(error)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        stat_type = params["stat_type"]
+        mode = params["mode"]
+        limit = params["limit"]
+
+        # Build the match stage
+        match_stage = {}
+        if params["merchant_id"]:
+            match_stage["merchantId"] = params["merchant_id"]
+        if params["start"] or params["end"]:
+            match_stage["createdAt"] = {}
+            if params["start"]:
+                match_stage["createdAt"]["$gte"] = params["start"]
+            if params["end"]:
+                match_stage["createdAt"]["$lt"] = params["end"]
+
+        # Both stat types come out of the same aggregation, so cache them together
+        cache_params = (
+            params["calendar"],
+            params["merchant_id"],
+            params["start"] and params["start"].date(),
+            params["end"] and params["end"].date(),
+            limit,
+        )
+        # The cache tiers and the coalescing of misses are blocking, so they run in a
+        # worker thread, which hands the aggregation back to the event loop
+        aggregate_page = async_to_sync(run_query_plan_async)
+        entry = await sync_to_async(history_cache.get_or_set, thread_sensitive=False)(
+            mode,
+            cache_params,
+            lambda: aggregate_page(plan_history_page(params, match_stage)),
+        )
+
+        # Clients holding the content of the cached entry do not need it again
+        # The digest survives recomputing the entry, unlike its time, so it is the only
+        # validator
+        validators = get_validators(f"history-{entry['digest']}")
+        not_modified = get_not_modified_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        rows = entry["rows"]
+
+        headers = {}
+        next_date = entry.get("next_date")
+        if limit is not None and len(rows) > limit:
+            next_date = rows[limit]["date"]
+            rows = rows[:limit]
+        if next_date is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                next_date.strftime("%Y-%m-%d"),
+            )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+
+        # Prepare the response data
+        response_data = [{"key": row["key"], "value": row[stat_type]} for row in rows]
+
+        # Encode the rows straight into JSON
+        response = HttpResponse(
+            transaction_encoder.encode(response_data),
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+            headers=headers,
+        )
+        return patch_validators(response, *validators)
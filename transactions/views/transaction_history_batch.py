@@ -0,0 +1,76 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from transactions.helpers import (
+    construct_history_pipeline,
+    format_group_id_to_date_key,
+    parse_batch_body,
+    parse_merchant_ids,
+    parse_stats_query_params,
+)
+from transactions.models import Transaction
+from transactions.serializers import transaction_encoder
+
+
+class TransactionHistoryBatchView(APIView):
+    """
+    API view to retrieve aggregated transaction statistics of many merchants at once.
+
+    Runs a single aggregation over the transactions of all requested merchants and
+    returns the same data as the transaction history endpoint, keyed by merchant.
+
+    Body Parameters:
+    - merchantIds (list): Required. The ObjectIds of the merchants.
+    - type (str): Required. Specifies the aggregation type, either 'count' or 'amount'.
+    - mode (str): Required. Specifies the grouping interval, one of 'daily', 'weekly', or 'monthly'.
+    - from (str): Optional. The first day to include, as YYYY-MM-DD.
+    - to (str): Optional. The last day to include, as YYYY-MM-DD.
+
+    Responses:
+    - 200 OK: An object mapping every requested merchantId to a list of aggregated transaction data with 'key' as the date grouping and 'value' as the aggregated amount or count.
+    - 400 Bad Request: Returned when invalid parameters are provided.
+    """
+
+    def post(self, request):
+        # Validate inputs
+        try:
+            params = parse_stats_query_params(parse_batch_body(request.data))
+            merchant_ids = parse_merchant_ids(request.data.get("merchantIds"))
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        stat_type = params["stat_type"]
+        mode = params["mode"]
+
+        # Build the match stage
+        match_stage = {"merchantId": {"$in": merchant_ids}}
+        if params["start"] or params["end"]:
+            match_stage["createdAt"] = {}
+            if params["start"]:
+                match_stage["createdAt"]["$gte"] = params["start"]
+            if params["end"]:
+                match_stage["createdAt"]["$lt"] = params["end"]
+
+        # Define the aggregation pipeline
+        pipeline = construct_history_pipeline(mode, match_stage, group_by_merchant=True)
+
+        # Prepare the response data, keeping merchants without transactions
+        response_data = {merchant_id: [] for merchant_id in merchant_ids}
+        for result in Transaction.objects.aggregate(*pipeline):
+            key = format_group_id_to_date_key(result["_id"], mode)
+            value = (
+                result["total_amount"]
+                if stat_type == "amount"
+                else result["total_count"]
+            )
+            response_data[result["_id"]["merchantId"]].append(
+                {"key": key, "value": value}
+            )
+
+        # Encode the rows straight into JSON
+        return HttpResponse(
+            transaction_encoder.encode_mapping(response_data),
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+        )
@@ -1,10 +1,53 @@
-from bson import ObjectId
+import gzip
+import re
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
-from transactions.models import TransactionSummary
-from transactions.serializers import TransactionSerializer
+from transactions.helpers import (
+    get_not_modified_response,
+    get_validators,
+    parse_stats_query_params,
+    patch_validators,
+    plan_generation_state,
+    plan_rendered_content,
+    plan_summary_rows,
+    run_query_plan,
+)
+from transactions.serializers import transaction_encoder
+
+# Matches the Accept-Encoding headers of clients that accept gzip, as GZipMiddleware does
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+def render_compressed_response(request, content):
+    """
+    Returns a gzip compressed JSON payload, decompressing it for clients that do not
+    accept gzip.
+
+    Parameters:
+    - request (HttpRequest): The request being answered.
+    - content (bytes): The gzip compressed JSON payload.
+
+    Returns:
+    - response (HttpResponse): The 200 OK response.
+    """
+    if ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+        response = HttpResponse(
+            content,
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+    else:
+        response = HttpResponse(
+            gzip.decompress(content), content_type="application/json"
+        )
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
 
 
 class TransactionSummaryView(APIView):
@@ -19,56 +62,84 @@ class TransactionSummaryView(APIView):
     - type (str): Required. Specifies the aggregation type, either 'count' or 'amount'.
     - mode (str): Required. Specifies the grouping interval, one of 'daily', 'weekly', or 'monthly'.
     - merchantId (str): Optional. The ObjectId of the merchant to filter transactions.
+    - from (str): Optional. The first day to include, as YYYY-MM-DD.
+    - to (str): Optional. The last day to include, as YYYY-MM-DD.
+    - limit (int): Optional. The maximum number of buckets to return.
+    - cursor (str): Optional. The cursor of the page to return, from the 'next' link.
+    - live (bool): Optional. When 'true', transactions created after the last summary
+      generation are aggregated live and merged into the precomputed summaries of the
+      last page.
+
+    The range is widened to whole buckets, so every bucket overlapping it is returned.
+    When more buckets are available than 'limit', the response carries a 'Link' header
+    pointing at the next page.
 
     Responses:
     - 200 OK: A list of aggregated transaction data with 'key' as the date grouping and 'value' as the aggregated amount or count.
     - 400 Bad Request: Returned when invalid query parameters are provided.
+
+    Whole series, requested without a range, pagination or 'live', are served from the
+    payloads pre-rendered by the summary generation job when available.
+
+    Responses other than 'live' ones carry an 'ETag' and 'Last-Modified' of the last
+    summary generation run, and conditional requests for unchanged summaries are
+    answered with 304 Not Modified before any summary is read.
     """
 
     def get(self, request):
-        stat_type = request.query_params.get("type")
-        mode = request.query_params.get("mode")
-        merchant_id = request.query_params.get("merchantId")
+        live = request.query_params.get("live", "").lower() in ["1", "true"]
 
         # Validate inputs
-        if stat_type not in ["count", "amount"]:
-            return Response(
-                {"error": "Invalid type parameter"}, status=status.HTTP_400_BAD_REQUEST
-            )
-        if mode not in ["daily", "weekly", "monthly"]:
-            return Response(
-                {"error": "Invalid mode parameter"}, status=status.HTTP_400_BAD_REQUEST
+        try:
+            params = parse_stats_query_params(request.query_params)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        limit = params["limit"]
+
+        # Summaries only change when a generation run completes, so its version
+        # validates every response but the live ones
+        state = run_query_plan(plan_generation_state())
+        validators = None
+        if not live:
+            validators = get_validators(
+                f"summary-{state.get('generation', 0)}", state.get("updated_at")
             )
+            not_modified = get_not_modified_response(request, *validators)
+            if not_modified is not None:
+                return not_modified
 
-        # Build the query
-        query = {
-            "mode": mode,
-            "stat_type": stat_type,
-        }
-        if merchant_id:
-            try:
-                merchant_obj_id = ObjectId(merchant_id)
-                query["merchantId"] = merchant_obj_id
-            except Exception:
-                return Response(
-                    {"error": "Invalid merchantId"}, status=status.HTTP_400_BAD_REQUEST
+        if not live and all(params[name] is None for name in ["start", "end", "limit"]):
+            content = run_query_plan(plan_rendered_content(params))
+            # Fall back to the query when the series was not rendered yet
+            if content is not None:
+                return patch_validators(
+                    render_compressed_response(request, content), *validators
                 )
-        else:
-            query["merchantId"] = None  # Query for overall summaries
-
-        # Retrieve data from TransactionSummary collection, sorted by date
-        summaries = TransactionSummary.objects.filter(**query).order_by("date")
-
-        # Prepare the response data
-        response_data = []
-        for summary in summaries:
-            response_data.append(
-                {
-                    "key": summary.key,
-                    "value": summary.value,
-                }
+
+        response_data, watermark = run_query_plan(
+            plan_summary_rows(params, state if live else None)
+        )
+
+        headers = {}
+        if limit is not None and len(response_data) > limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                response_data[limit]["date"].strftime("%Y-%m-%d"),
             )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+            response_data = response_data[:limit]
+        if watermark is not None:
+            # Only responses the live tail was merged into report the watermark
+            headers["X-Summary-Watermark"] = watermark.isoformat()
 
-        # Use the serializer to serialize the response data
-        serializer = TransactionSerializer(response_data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Encode the rows straight into JSON
+        response = HttpResponse(
+            transaction_encoder.encode(response_data),
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+            headers=headers,
+        )
+        if validators is not None:
+            patch_validators(response, *validators)
+        return response
@@ -0,0 +1,88 @@
+from django.http import HttpResponse, JsonResponse
+from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
+
+from transactions.helpers import (
+    get_not_modified_response,
+    get_validators,
+    parse_stats_query_params,
+    patch_validators,
+    plan_generation_state,
+    plan_rendered_content,
+    plan_summary_rows,
+    run_query_plan_async,
+)
+from transactions.serializers import transaction_encoder
+
+from .async_mongo_view import AsyncMongoView
+from .transactions_summary import render_compressed_response
+
+
+class AsyncTransactionSummaryView(AsyncMongoView):
+    """
+    Async view to retrieve precomputed transaction summaries based on type and mode.
+
+    Serves the same query parameters and responses as `TransactionSummaryView`, but
+    reads the summaries and the live tail through the async MongoDB driver. Under
+    ASGI, a worker keeps serving other requests while queries are running.
+    """
+
+    async def get(self, request):
+        live = request.GET.get("live", "").lower() in ["1", "true"]
+
+        # Validate inputs
+        try:
+            params = parse_stats_query_params(request.GET)
+        except ValueError as error:
+            return JsonResponse(
+                {"error": str(error)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = params["limit"]
+
+        # Summaries only change when a generation run completes, so its version
+        # validates every response but the live ones
+        state = await run_query_plan_async(plan_generation_state())
+        validators = None
+        if not live:
+            validators = get_validators(
+                f"summary-{state.get('generation', 0)}", state.get("updated_at")
+            )
+            not_modified = get_not_modified_response(request, *validators)
+            if not_modified is not None:
+                return not_modified
+
+        if not live and all(params[name] is None for name in ["start", "end", "limit"]):
+            content = await run_query_plan_async(plan_rendered_content(params))
+            # Fall back to the query when the series was not rendered yet
+            if content is not None:
+                return patch_validators(
+                    render_compressed_response(request, content), *validators
+                )
+
+        response_data, watermark = await run_query_plan_async(
+            plan_summary_rows(params, state if live else None)
+        )
+
+        headers = {}
+        if limit is not None and len(response_data) > limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                "cursor",
+                response_data[limit]["date"].strftime("%Y-%m-%d"),
+            )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+            response_data = response_data[:limit]
+        if watermark is not None:
+            # Only responses the live tail was merged into report the watermark
+            headers["X-Summary-Watermark"] = watermark.isoformat()
+
+        # Encode the rows straight into JSON
+        response = HttpResponse(
+            transaction_encoder.encode(response_data),
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+            headers=headers,
+        )
+        if validators is not None:
+            patch_validators(response, *validators)
+        return response
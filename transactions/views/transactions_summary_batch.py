@@ -0,0 +1,73 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from transactions.helpers import (
+    parse_batch_body,
+    parse_merchant_ids,
+    parse_stats_query_params,
+)
+from transactions.models import TransactionSummary
+from transactions.serializers import transaction_encoder
+
+
+class TransactionSummaryBatchView(APIView):
+    """
+    API view to retrieve precomputed transaction summaries of many merchants at once.
+
+    Runs a single query over the summaries of all requested merchants and returns the
+    same data as the transaction summary endpoint, keyed by merchant.
+
+    Body Parameters:
+    - merchantIds (list): Required. The ObjectIds of the merchants.
+    - type (str): Required. Specifies the aggregation type, either 'count' or 'amount'.
+    - mode (str): Required. Specifies the grouping interval, one of 'daily', 'weekly', or 'monthly'.
+    - from (str): Optional. The first day to include, as YYYY-MM-DD.
+    - to (str): Optional. The last day to include, as YYYY-MM-DD.
+
+    Responses:
+    - 200 OK: An object mapping every requested merchantId to a list of aggregated transaction data with 'key' as the date grouping and 'value' as the aggregated amount or count.
+    - 400 Bad Request: Returned when invalid parameters are provided.
+    """
+
+    def post(self, request):
+        # Validate inputs
+        try:
+            params = parse_stats_query_params(parse_batch_body(request.data))
+            merchant_ids = parse_merchant_ids(request.data.get("merchantIds"))
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Build the query
+        query = {
+            "mode": params["mode"],
+            "merchantId__in": merchant_ids,
+        }
+        if params["start"]:
+            query["date__gte"] = params["start"]
+        if params["end"]:
+            query["date__lt"] = params["end"]
+
+        # Retrieve data from TransactionSummary collection, sorted by merchant and date
+        # Every summary holds all stat types, so only the requested one is read
+        stat_type = params["stat_type"]
+        summaries = (
+            TransactionSummary.objects.filter(**query)
+            .order_by("merchantId", "date")
+            .only("merchantId", "key", stat_type)
+        )
+
+        # Prepare the response data, keeping merchants without summaries
+        response_data = {merchant_id: [] for merchant_id in merchant_ids}
+        for summary in summaries:
+            response_data[summary.merchantId].append(
+                {"key": summary.key, "value": summary.get_value(stat_type)}
+            )
+
+        # Encode the rows straight into JSON
+        return HttpResponse(
+            transaction_encoder.encode_mapping(response_data),
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+        )
@@ -3,6 +3,13 @@ from __future__ import absolute_import, unicode_literals
 import os
 
 from celery import Celery
+from celery.signals import task_postrun, task_prerun
+
+from zibal.mongo_monitoring import (
+    current_mongo_timer,
+    start_mongo_timer,
+    stop_mongo_timer,
+)
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "zibal.settings")
@@ -15,3 +22,25 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+
+@task_prerun.connect
+def start_task_mongo_timer(task=None, **kwargs):
+    start_mongo_timer(f"task {task.name}")
+
+
+@task_postrun.connect
+def record_task_mongo_timer(task=None, **kwargs):
+    # Imported here, as the metrics need the settings this module is loaded before
+    from zibal.metrics import metrics_registry, record_mongo_timer
+
+    timer = current_mongo_timer.get()
+    if timer is None:
+        return
+    stop_mongo_timer()
+    labels = (("task", task.name),)
+    metrics_registry.increment("celery_task_mongo_seconds_total", labels, timer.seconds)
+    metrics_registry.increment(
+        "celery_task_mongo_commands_total", labels, timer.commands
+    )
+    record_mongo_timer(metrics_registry, timer)
@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import queue
+import threading
+import weakref
+from logging.handlers import TimedRotatingFileHandler
+
+# Policies of a QueueFileHandler whose queue is full
+FULL_POLICIES = ("drop", "block")
+
+
+def restart_writer(handler):
+    """
+    Starts the writer thread of a QueueFileHandler in a forked process.
+
+    Parameters:
+    ----------
+    handler : weakref.ref
+        A reference to the handler, which may have been garbage collected.
+    """
+    handler = handler()
+    if handler is not None and not handler.closed:
+        handler.start()
+
+
+class JsonMessage:
+    """
+    A log message rendered as JSON only when its record is formatted, which the
+    QueueFileHandler does outside of the logging thread.
+
+    Attributes:
+    ----------
+    data : dict
+        The data to render.
+    """
+
+    __slots__ = ["data"]
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return json.dumps(self.data)
+
+
+class BatchingTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    A TimedRotatingFileHandler that can write many records with a single flush.
+    """
+
+    def emit_batch(self, records):
+        """
+        Writes the records, rolling the file over where needed, and flushes once.
+
+        Parameters:
+        ----------
+        records : list
+            The log records to write, in order.
+        """
+        for record in records:
+            try:
+                if self.shouldRollover(record):
+                    self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(self.format(record) + self.terminator)
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        self.flush()
+
+
+class QueueFileHandler(logging.Handler):
+    """
+    Logging handler that hands records to a bounded in-memory queue, drained by a
+    background thread writing them to a time rotated file in batches.
+
+    Like a QueueHandler and QueueListener pair, logging only costs the calling thread
+    an enqueue: records are formatted and written by the writer thread. Messages are
+    formatted there too, so loggers can pass objects that render lazily.
+
+    Attributes:
+    ----------
+    target : BatchingTimedRotatingFileHandler
+        The handler writing the records.
+    batch_size : int
+        The largest number of records written with a single flush.
+    full_policy : str
+        'drop' discards records when the queue is full, 'block' waits up to
+        `block_timeout` seconds for room before discarding them.
+    block_timeout : float
+        The longest time a record waits for room in a full queue under 'block'.
+    dropped : int
+        The number of records discarded because the queue was full; the writer
+        thread also logs how many were dropped since its last batch.
+    """
+
+    def __init__(
+        self,
+        filename,
+        when="h",
+        backupCount=0,
+        encoding=None,
+        max_queue_size=10000,
+        batch_size=100,
+        full_policy="drop",
+        block_timeout=1.0,
+    ):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"Invalid full policy {full_policy!r}")
+        super().__init__()
+        self.target = BatchingTimedRotatingFileHandler(
+            filename, when=when, backupCount=backupCount, encoding=encoding, delay=True
+        )
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+        self.reported_dropped = 0
+        self.closed = False
+        self.start()
+
+        # Threads do not survive a fork, so forked workers start their own writer
+        handler = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: restart_writer(handler))
+
+    def start(self):
+        """
+        Starts the writer thread with a new queue.
+        """
+        self.queue = queue.Queue(self.max_queue_size)
+        self.writer = threading.Thread(
+            target=self.drain, name="QueueFileHandler", daemon=True
+        )
+        self.writer.start()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def emit(self, record):
+        try:
+            if self.full_policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+    def drain(self):
+        """
+        Writes the queued records until the handler is closed; runs in the writer thread.
+        """
+        while True:
+            # Wait for a record, then take whatever else is queued up to a batch
+            records = [self.queue.get()]
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in records
+            records = [record for record in records if record is not None]
+
+            dropped = self.dropped
+            if dropped > self.reported_dropped:
+                records.append(
+                    logging.makeLogRecord(
+                        {
+                            "name": __name__,
+                            "module": "logging_handlers",
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": "Dropped %d log records as the queue was full",
+                            "args": (dropped - self.reported_dropped,),
+                        }
+                    )
+                )
+                self.reported_dropped = dropped
+
+            if records:
+                with self.target.lock:
+                    self.target.emit_batch(records)
+            if stop:
+                return
+
+    def close(self):
+        """
+        Writes the records still queued, then stops the writer thread.
+        """
+        self.closed = True
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        self.target.close()
+        super().close()
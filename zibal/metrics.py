@@ -0,0 +1,354 @@
+import atexit
+import json
+import os
+import socket
+import threading
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+
+
+def format_labels(labels):
+    """
+    Formats label pairs as a Prometheus label set, e.g. '{route="api/",status="200"}'.
+    """
+    if not labels:
+        return ""
+    escaped = [
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels
+    ]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def record_mongo_timer(registry, timer):
+    """
+    Adds the MongoDB commands accumulated by a timer to the per command counters.
+
+    Parameters:
+    ----------
+    registry : MetricsRegistry
+        The registry to add to.
+    timer : MongoTimer
+        The timer of a finished request or task.
+    """
+    for (command_name, collection), totals in timer.by_command.items():
+        commands, seconds, documents, slow_commands = totals
+        labels = (("command", command_name), ("collection", collection or ""))
+        registry.increment("mongo_commands_total", labels, commands)
+        registry.increment("mongo_command_seconds_total", labels, seconds)
+        registry.increment("mongo_documents_returned_total", labels, documents)
+        if slow_commands:
+            registry.increment("mongo_slow_commands_total", labels, slow_commands)
+
+
+def is_process_alive(pid):
+    """
+    Returns whether a process with the given pid runs on this host.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process runs as another user
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """
+    Counters and fixed bucket histograms shared by the worker processes of the server.
+
+    Every process updates its own samples in memory under a single lock, and a
+    background thread writes them to a file of the process in `directory` every
+    `flush_interval` seconds. Rendering sums the files of every process, so each
+    worker can answer for all of them, including the workers of other containers
+    sharing the directory. A process removes its file when it exits, and the files of
+    processes of the same host that died without doing so are removed when samples
+    are collected or a process starts writing, so the samples of exited processes
+    leave the totals, which Prometheus treats as a counter reset.
+
+    Attributes:
+    ----------
+    directory : str
+        The directory the processes share their samples through.
+    buckets : tuple
+        The upper bounds of the histogram buckets, in ascending order.
+    flush_interval : float
+        Seconds between two writes of the samples of the process.
+    descriptions : dict
+        The (type, help) of every metric name, see `describe`.
+    """
+
+    def __init__(self, directory, buckets, flush_interval=1.0):
+        self.directory = directory
+        self.buckets = tuple(buckets)
+        self.flush_interval = flush_interval
+        self.descriptions = {}
+        self.lock = threading.Lock()
+        self.reset()
+        # Forked workers start with empty samples, as their parent writes its own
+        os.register_at_fork(after_in_child=self.reset)
+        atexit.register(self.close)
+
+    def reset(self):
+        """
+        Drops the samples of the process; the next update starts a new writer thread.
+        """
+        # Hosts share the directory and pids are reused, so every process gets its
+        # own file rather than taking over the one of an exited process
+        self.path = os.path.join(
+            self.directory,
+            f"metrics_{socket.gethostname()}_{os.getpid()}_{uuid.uuid4().hex}.json",
+        )
+        self.samples = {}
+        self.writer = None
+        self.closed = False
+
+    def describe(self, name, kind, help_text):
+        """
+        Declares the type, 'counter' or 'histogram', and help text of a metric.
+        """
+        self.descriptions[name] = (kind, help_text)
+
+    def increment(self, name, labels, amount=1):
+        """
+        Adds to a counter.
+
+        Parameters:
+        ----------
+        name : str
+            The name of the counter.
+        labels : tuple
+            The (name, value) pairs of its labels.
+        amount : float
+            The amount to add.
+        """
+        key = (name, labels)
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+        self.start_writer()
+
+    def observe(self, name, labels, value):
+        """
+        Records a value in a histogram.
+
+        Parameters:
+        ----------
+        name : str
+            The name of the histogram.
+        labels : tuple
+            The (name, value) pairs of its labels.
+        value : float
+            The value to record.
+        """
+        key = (name, labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                # One count per bucket, the count above the last bucket and the sum
+                sample = self.samples[key] = [0] * (len(self.buckets) + 2)
+            sample[index] += 1
+            sample[-1] += value
+        self.start_writer()
+
+    def start_writer(self):
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    self.writer = threading.Thread(
+                        target=self.write_periodically,
+                        name="MetricsWriter",
+                        daemon=True,
+                    )
+                    self.writer.start()
+            self.remove_dead_files()
+
+    def write_periodically(self):
+        stopped = threading.Event()
+        while not stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                # Try again on the next interval
+                pass
+
+    def snapshot(self):
+        """
+        Returns the samples of the process as a JSON serializable list.
+        """
+        with self.lock:
+            return [
+                [name, [list(pair) for pair in labels], value]
+                for (name, labels), value in self.samples.items()
+            ]
+
+    def flush(self):
+        """
+        Writes the samples of the process to its file, replacing it atomically.
+        """
+        if not self.samples or self.closed:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary_path, self.path)
+
+    def close(self):
+        """
+        Removes the file of the process, as it exits.
+        """
+        self.closed = True
+        for path in [self.path, f"{self.path}.tmp"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def remove_dead_files(self):
+        """
+        Removes the files of the processes of this host that exited without removing
+        them, e.g. workers killed or ended with os._exit.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        hostname = socket.gethostname()
+        for filename in os.listdir(self.directory):
+            if not filename.startswith("metrics_"):
+                continue
+            try:
+                host, pid, _ = filename[len("metrics_") :].rsplit("_", 2)
+                pid = int(pid)
+            except ValueError:
+                continue
+            if host != hostname or is_process_alive(pid):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                # Removed by another process
+                pass
+
+    def collect(self):
+        """
+        Sums the samples of every process, reading the current process live.
+
+        Returns:
+        -------
+        dict
+            The summed counter value or histogram list of every (name, labels) pair.
+        """
+        snapshots = [self.snapshot()]
+        self.remove_dead_files()
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                path = os.path.join(self.directory, filename)
+                if not filename.endswith(".json") or path == self.path:
+                    continue
+                try:
+                    with open(path) as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError):
+                    # The file of a process that is being written or went away
+                    continue
+
+        totals = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if isinstance(value, list):
+                    total = totals.get(key)
+                    if total is None:
+                        totals[key] = list(value)
+                    elif len(total) == len(value):
+                        totals[key] = [a + b for a, b in zip(total, value)]
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self):
+        """
+        Renders the samples of every process in the Prometheus text format.
+        """
+        by_name = {}
+        for (name, labels), value in sorted(self.collect().items()):
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, samples in by_name.items():
+            kind, help_text = self.descriptions.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if not isinstance(value, list):
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip([*map(repr, self.buckets), "+Inf"], value[:-1]):
+                    cumulative += count
+                    lines.append(
+                        f"{name}_bucket{format_labels((*labels, ('le', bound)))} "
+                        f"{cumulative}"
+                    )
+                lines.append(f"{name}_sum{format_labels(labels)} {value[-1]}")
+                lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry(
+    settings.METRICS_DIR,
+    settings.METRICS_LATENCY_BUCKETS,
+    flush_interval=settings.METRICS_FLUSH_INTERVAL,
+)
+metrics_registry.describe(
+    "http_request_duration_seconds",
+    "histogram",
+    "Latency of the HTTP requests by route, method and status.",
+)
+metrics_registry.describe(
+    "http_request_mongo_seconds_total",
+    "counter",
+    "Time spent in MongoDB commands while handling HTTP requests.",
+)
+metrics_registry.describe(
+    "http_request_mongo_commands_total",
+    "counter",
+    "Number of MongoDB commands run while handling HTTP requests.",
+)
+metrics_registry.describe(
+    "celery_task_mongo_seconds_total",
+    "counter",
+    "Time spent in MongoDB commands while running Celery tasks.",
+)
+metrics_registry.describe(
+    "celery_task_mongo_commands_total",
+    "counter",
+    "Number of MongoDB commands run while running Celery tasks.",
+)
+metrics_registry.describe(
+    "mongo_commands_total",
+    "counter",
+    "Number of MongoDB commands run by requests and tasks, by command and collection.",
+)
+metrics_registry.describe(
+    "mongo_command_seconds_total",
+    "counter",
+    "Time spent in MongoDB commands by requests and tasks, by command and collection.",
+)
+metrics_registry.describe(
+    "mongo_documents_returned_total",
+    "counter",
+    "Number of documents returned by MongoDB commands, by command and collection.",
+)
+metrics_registry.describe(
+    "mongo_slow_commands_total",
+    "counter",
+    "Number of MongoDB commands over MONGO_SLOW_COMMAND_MS, by command and collection.",
+)
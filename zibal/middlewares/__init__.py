@@ -1 +1,2 @@
 from .request_log_middleware import RequestLogMiddleware
+from .request_metrics_middleware import RequestMetricsMiddleware
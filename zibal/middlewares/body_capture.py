@@ -0,0 +1,114 @@
+import hashlib
+import random
+
+# How a body is captured: not at all, its first bytes, or whole for a sample of requests
+CAPTURE_MODES = ("off", "truncated", "sampled")
+
+
+class BodyCapture:
+    """
+    Decides how much of the request and response bodies the request log captures.
+
+    Bodies are captured as raw text, never parsed, along with their size and optionally
+    their SHA-256 hash. Rules matching a path prefix and, optionally, a set of methods
+    override the default capture; the first matching rule applies.
+
+    Attributes:
+    ----------
+    default : dict
+        The capture of requests no rule matches, with the keys:
+        - mode (str): One of 'off', 'truncated' or 'sampled'.
+        - max_bytes (int): The number of bytes kept of a 'truncated' body.
+        - sample_rate (float): The fraction of requests whose bodies are kept whole
+          under 'sampled'.
+        - hash (bool): Whether to log the SHA-256 hash of the whole body.
+    rules : list
+        The (path prefix, methods or None, capture) of every rule, where the capture
+        is the default updated with the rule.
+    """
+
+    def __init__(self, default, rules=()):
+        self.default = self.validate(dict(default))
+        self.rules = []
+        for rule in rules:
+            rule = dict(rule)
+            path = rule.pop("path", "")
+            methods = rule.pop("methods", None)
+            self.rules.append(
+                (
+                    path,
+                    methods and {method.upper() for method in methods},
+                    self.validate({**self.default, **rule}),
+                )
+            )
+
+    def validate(self, capture):
+        """
+        Returns the capture if its mode is known.
+
+        Raises:
+        ------
+        ValueError
+            If the mode is not one of `CAPTURE_MODES`.
+        """
+        if capture["mode"] not in CAPTURE_MODES:
+            raise ValueError(f"Invalid body capture mode {capture['mode']!r}")
+        return capture
+
+    def get_capture(self, path, method):
+        """
+        Returns the capture of a request.
+
+        Parameters:
+        ----------
+        path : str
+            The path of the request.
+        method : str
+            The HTTP method of the request.
+
+        Returns:
+        -------
+        dict
+            The capture of the first matching rule, or the default one, with a
+            'sampled' flag telling whether 'sampled' bodies are kept.
+        """
+        capture = self.default
+        for path_prefix, methods, rule_capture in self.rules:
+            if path.startswith(path_prefix) and (methods is None or method in methods):
+                capture = rule_capture
+                break
+        # Request and response bodies are kept together, so sample once per request
+        sampled = (
+            capture["mode"] == "sampled" and random.random() < capture["sample_rate"]
+        )
+        return {**capture, "sampled": sampled}
+
+    def capture(self, capture, body):
+        """
+        Captures a body as configured.
+
+        Parameters:
+        ----------
+        capture : dict
+            The capture of the request, from `get_capture`.
+        body : bytes
+            The whole body.
+
+        Returns:
+        -------
+        dict
+            The captured 'body' text or None, its 'size' in bytes, whether it was
+            'truncated' and, if enabled, its 'sha256' hex digest.
+        """
+        captured = {"body": None, "size": len(body), "truncated": False}
+        if capture["hash"]:
+            captured["sha256"] = hashlib.sha256(body).hexdigest()
+
+        if capture["mode"] == "truncated":
+            captured["truncated"] = len(body) > capture["max_bytes"]
+            body = body[: capture["max_bytes"]]
+        elif not capture["sampled"]:
+            return captured
+        # A truncated body may end within a character, which is replaced
+        captured["body"] = body.decode("utf-8", "replace")
+        return captured
@@ -1,9 +1,13 @@
-import json
 import logging
 from datetime import datetime
 
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 
+from zibal.logging_handlers import JsonMessage
+
+from .body_capture import BodyCapture
+
 # Set up the custom logger for request logging
 request_logger = logging.getLogger("request_logger")
 
@@ -18,11 +22,20 @@ class RequestLogMiddleware(MiddlewareMixin):
         List of URL prefixes to exclude from logging.
     method_allowed : list
         List of HTTP methods to include in logging.
+    body_capture : BodyCapture
+        How much of the request and response bodies is logged, see
+        `REQUEST_LOG_BODY_CAPTURE` and `REQUEST_LOG_BODY_CAPTURE_RULES`.
     """
 
     exclude_url_starts = []
     method_allowed = ["GET", "POST", "PUT", "PATCH", "DELETE"]
 
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.body_capture = BodyCapture(
+            settings.REQUEST_LOG_BODY_CAPTURE, settings.REQUEST_LOG_BODY_CAPTURE_RULES
+        )
+
     def process_request(self, request):
         """
         Process the incoming request.
@@ -58,7 +71,7 @@ class RequestLogMiddleware(MiddlewareMixin):
         if hasattr(request, "request_time"):
             request.response_time = datetime.now()
             log_data = self.extract_log_info(request=request, response=response)
-            request_logger.info(json.dumps(log_data))
+            request_logger.info(JsonMessage(log_data))
         return response
 
     def process_exception(self, request, exception):
@@ -79,7 +92,7 @@ class RequestLogMiddleware(MiddlewareMixin):
         if hasattr(request, "request_time"):
             request.response_time = datetime.now()
             log_data = self.extract_log_info(request=request, exception=exception)
-            request_logger.error(json.dumps(log_data))
+            request_logger.error(JsonMessage(log_data))
 
     def extract_log_info(self, request, response=None, exception=None):
         """
@@ -115,31 +128,60 @@ class RequestLogMiddleware(MiddlewareMixin):
             ),
         }
 
-        # Log request body
-        try:
-            if request.method in ["POST", "PUT", "PATCH"]:
-                log_data["request_body"] = json.loads(request.req_body.decode("utf-8"))
+        # Log the bodies as raw text with their size and hash, as configured for the path
+        capture = self.body_capture.get_capture(request.path, request.method)
+        if request.method in ["POST", "PUT", "PATCH"]:
+            self.add_body_info(
+                log_data, "request_body", capture, getattr(request, "req_body", b"")
+            )
+        else:
+            log_data["request_body"] = None  # No body for GET or DELETE
+        if response:
+            if response.streaming:
+                # Streamed bodies are not buffered, so they cannot be logged
+                log_data["response_body"] = None
+                log_data["response_body_streaming"] = True
+            elif response.has_header("Content-Encoding"):
+                # Compressed bodies are not text, so only their metadata is logged
+                self.add_body_info(
+                    log_data,
+                    "response_body",
+                    {**capture, "mode": "off"},
+                    response.content,
+                )
+                log_data["response_body_encoding"] = response["Content-Encoding"]
             else:
-                log_data["request_body"] = None  # No body for GET or DELETE
-        except (json.JSONDecodeError, ValueError, UnicodeDecodeError, AttributeError):
-            log_data["request_body"] = "Could not decode body; may not be JSON."
-        except Exception as error:
-            log_data["request_body"] = f"Could not decode body. Error: {error}"
+                self.add_body_info(log_data, "response_body", capture, response.content)
 
-        # Log response body
-        if response:
-            try:
-                response_body = json.loads(response.content.decode("utf-8"))
-                log_data["response_body"] = response_body
-            except (json.JSONDecodeError, ValueError, UnicodeDecodeError):
-                log_data["response_body"] = "Could not decode body; may not be JSON."
-            except AttributeError:
-                log_data["response_body"] = "No body present."
-            except Exception as error:
-                log_data["response_body"] = f"Could not decode body. Error: {error}"
+        # The MongoDB commands of the request, see RequestMetricsMiddleware
+        mongo_timer = getattr(request, "mongo_timer", None)
+        if mongo_timer is not None:
+            log_data["mongo_commands"] = mongo_timer.commands
+            log_data["mongo_time_ms"] = round(mongo_timer.seconds * 1000, 3)
+            log_data["mongo_documents_returned"] = mongo_timer.documents
 
         # Log exception
         if exception:
             log_data["exception"] = str(exception)
 
         return log_data
+
+    def add_body_info(self, log_data, name, capture, body):
+        """
+        Adds a captured body and its metadata to the log information.
+
+        Parameters:
+        ----------
+        log_data : dict
+            The log information; updated in place.
+        name : str
+            The name of the body field, e.g. 'request_body'.
+        capture : dict
+            The capture of the request, see `BodyCapture.get_capture`.
+        body : bytes
+            The whole body.
+        """
+        captured = self.body_capture.capture(capture, body)
+        log_data[name] = captured.pop("body")
+        for key, value in captured.items():
+            log_data[f"{name}_{key}"] = value
@@ -0,0 +1,76 @@
+import time
+
+from django.utils.deprecation import MiddlewareMixin
+
+from zibal.metrics import metrics_registry, record_mongo_timer
+from zibal.mongo_monitoring import start_mongo_timer, stop_mongo_timer
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    """
+    Middleware recording the latency of each request and the MongoDB commands it ran.
+
+    Requests are labelled with their resolved route pattern rather than their path, so
+    the number of series stays bounded; requests that resolved no route are labelled
+    'unmatched'. Place it first, so the latency covers the other middlewares too.
+    Streamed responses are recorded once their body has been sent, as their queries
+    run while it is produced.
+    """
+
+    def process_request(self, request):
+        request.metrics_started = time.perf_counter()
+        request.mongo_timer = start_mongo_timer(f"{request.method} {request.path}")
+
+    def process_response(self, request, response):
+        if getattr(request, "metrics_started", None) is None:
+            return response
+        if response.streaming:
+            # Streamed bodies are produced, and their queries run, while they are sent
+            record_after_streaming = (
+                self.record_after_async_streaming
+                if response.is_async
+                else self.record_after_streaming
+            )
+            response.streaming_content = record_after_streaming(
+                request, response, response.streaming_content
+            )
+        else:
+            self.record(request, response)
+        return response
+
+    def record_after_streaming(self, request, response, content):
+        """
+        Yields the streamed content, then records the request once it has been sent or
+        the response is closed.
+        """
+        try:
+            yield from content
+        finally:
+            self.record(request, response)
+
+    async def record_after_async_streaming(self, request, response, content):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            self.record(request, response)
+
+    def record(self, request, response):
+        duration = time.perf_counter() - request.metrics_started
+        stop_mongo_timer()
+
+        resolver_match = getattr(request, "resolver_match", None)
+        route = resolver_match.route if resolver_match else "unmatched"
+        labels = (("route", route), ("method", request.method))
+        metrics_registry.observe(
+            "http_request_duration_seconds",
+            (*labels, ("status", str(response.status_code))),
+            duration,
+        )
+        metrics_registry.increment(
+            "http_request_mongo_seconds_total", labels, request.mongo_timer.seconds
+        )
+        metrics_registry.increment(
+            "http_request_mongo_commands_total", labels, request.mongo_timer.commands
+        )
+        record_mongo_timer(metrics_registry, request.mongo_timer)
@@ -0,0 +1,195 @@
+import contextvars
+import json
+import logging
+
+from pymongo import monitoring
+
+from zibal.logging_handlers import JsonMessage
+
+# Set up the logger of the commands slower than the threshold of the listener
+slow_command_logger = logging.getLogger("slow_command_logger")
+
+# The MongoTimer of the request or task being handled, or None outside of them
+current_mongo_timer = contextvars.ContextVar("current_mongo_timer", default=None)
+
+# Fields of a command that are driver bookkeeping rather than part of its shape
+IGNORED_COMMAND_FIELDS = {"lsid", "txnNumber", "$clusterTime", "$db", "$readPreference"}
+
+
+class MongoTimer:
+    """
+    Accumulates the MongoDB commands run on behalf of a request or task.
+
+    Attributes:
+    ----------
+    label : str
+        What the commands are run for, e.g. 'GET /api/transactions/' or a task name;
+        logged with the slow commands.
+    commands : int
+        The number of commands that completed.
+    seconds : float
+        The time the commands took, as measured by the driver.
+    documents : int
+        The number of documents the commands returned.
+    by_command : dict
+        The [commands, seconds, documents, slow commands] of every (command name,
+        collection) pair.
+    """
+
+    __slots__ = ["label", "commands", "seconds", "documents", "by_command"]
+
+    def __init__(self, label=None):
+        self.label = label
+        self.commands = 0
+        self.seconds = 0.0
+        self.documents = 0
+        self.by_command = {}
+
+
+def start_mongo_timer(label=None):
+    """
+    Starts accumulating the MongoDB commands of the current context into a new timer.
+
+    Parameters:
+    ----------
+    label : str, optional
+        What the commands are run for, see `MongoTimer.label`.
+
+    Returns:
+    -------
+    MongoTimer
+        The timer the commands are added to.
+    """
+    timer = MongoTimer(label)
+    current_mongo_timer.set(timer)
+    return timer
+
+
+def stop_mongo_timer():
+    """
+    Stops accumulating the MongoDB commands of the current context.
+    """
+    current_mongo_timer.set(None)
+
+
+def get_collection(command_name, command):
+    """
+    Returns the collection a command runs on, or None for database and admin commands.
+    """
+    if command_name == "getMore":
+        return command.get("collection")
+    collection = command.get(command_name)
+    return collection if isinstance(collection, str) else None
+
+
+def get_shape(value):
+    """
+    Returns the shape of a command, pipeline or filter: its structure with the values
+    replaced by '?'. Field paths such as '$merchantId' are kept, and lists of elements
+    of the same shape, e.g. the values of an $in, are collapsed to one element.
+    """
+    if isinstance(value, dict):
+        return {key: get_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = {}
+        for item in value:
+            shape = get_shape(item)
+            shapes.setdefault(json.dumps(shape, sort_keys=True), shape)
+        return list(shapes.values())
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def get_documents_returned(reply):
+    cursor = reply.get("cursor")
+    if cursor is None:
+        return 0
+    return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    A pymongo command listener attributing the duration, returned documents and
+    collection of every command to the timer of the context that ran it, and logging
+    the commands slower than a threshold with their shape.
+
+    Commands outside of a timed context are only checked against the threshold.
+
+    Attributes:
+    ----------
+    slow_command_micros : int or None
+        The duration from which commands are logged, in microseconds; None disables
+        the slow command log.
+    started_commands : dict
+        The (command name, collection, command) of every command in flight, by
+        connection and request id.
+    """
+
+    def __init__(self, slow_command_ms=None):
+        self.slow_command_micros = (
+            None if slow_command_ms is None else int(slow_command_ms * 1000)
+        )
+        self.started_commands = {}
+
+    def started(self, event):
+        command_name = event.command_name
+        self.started_commands[(event.connection_id, event.request_id)] = (
+            command_name,
+            get_collection(command_name, event.command),
+            event.command,
+        )
+
+    def succeeded(self, event):
+        self.record(event, get_documents_returned(event.reply))
+
+    def failed(self, event):
+        self.record(event, 0, failure=event.failure)
+
+    def record(self, event, documents, failure=None):
+        started = self.started_commands.pop(
+            (event.connection_id, event.request_id), None
+        )
+        if started is None:
+            # Started before the listener was registered
+            return
+        command_name, collection, command = started
+        slow = (
+            self.slow_command_micros is not None
+            and event.duration_micros >= self.slow_command_micros
+        )
+
+        timer = current_mongo_timer.get()
+        if timer is not None:
+            seconds = event.duration_micros / 1e6
+            timer.commands += 1
+            timer.seconds += seconds
+            timer.documents += documents
+            totals = timer.by_command.get((command_name, collection))
+            if totals is None:
+                totals = timer.by_command[(command_name, collection)] = [0, 0.0, 0, 0]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += documents
+            totals[3] += slow
+
+        if slow:
+            log_data = {
+                "command": command_name,
+                "database": event.database_name,
+                "collection": collection,
+                "duration_ms": event.duration_micros / 1000,
+                "documents_returned": documents,
+                "context": timer.label if timer is not None else None,
+                "shape": get_shape(
+                    {
+                        key: value
+                        for key, value in command.items()
+                        # The collection is logged on its own
+                        if key != command_name and key not in IGNORED_COMMAND_FIELDS
+                    }
+                ),
+            }
+            if failure is not None:
+                log_data["failure"] = failure.get("errmsg")
+            slow_command_logger.warning(JsonMessage(log_data))
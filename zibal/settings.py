@@ -9,14 +9,18 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+
 import os
-from datetime import datetime
+import tempfile
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from celery.schedules import crontab
 from dotenv import load_dotenv
 from mongoengine import connect
 
+from zibal.mongo_monitoring import MongoCommandListener
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,6 +58,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "zibal.middlewares.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -88,7 +93,77 @@ WSGI_APPLICATION = "zibal.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-connect(host=os.getenv("DB_CONNECTION_STRING"))
+# MongoDB command instrumentation: the duration, returned documents and collection of
+# every command are attributed to the request or Celery task running it and exported
+# by /metrics, and commands taking MONGO_SLOW_COMMAND_MS or longer are logged with their
+# shape. When disabled no listener is registered with the clients, so it costs nothing
+MONGO_MONITORING_ENABLED = os.getenv("MONGO_MONITORING_ENABLED", "True") == "True"
+MONGO_SLOW_COMMAND_MS = float(os.getenv("MONGO_SLOW_COMMAND_MS", "100"))
+MONGO_EVENT_LISTENERS = (
+    [MongoCommandListener(MONGO_SLOW_COMMAND_MS)] if MONGO_MONITORING_ENABLED else []
+)
+
+connect(host=os.getenv("DB_CONNECTION_STRING"), event_listeners=MONGO_EVENT_LISTENERS)
+
+# The async views use their own client and connection pool per event loop
+ASYNC_DB_CONNECTION_STRING = os.getenv("DB_CONNECTION_STRING")
+ASYNC_DB_MAX_POOL_SIZE = int(os.getenv("ASYNC_DB_MAX_POOL_SIZE", "100"))
+
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Set to share the transaction history cache between processes, e.g. redis://redis:6379/1
+TRANSACTION_CACHE_REDIS_URL = os.getenv("TRANSACTION_CACHE_REDIS_URL")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # In-process tier, evicts the least recently used entries beyond MAX_ENTRIES
+    "transactions_local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "transactions",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(
+                os.getenv("TRANSACTION_CACHE_LOCAL_MAX_ENTRIES", "1000")
+            ),
+        },
+    },
+}
+if TRANSACTION_CACHE_REDIS_URL:
+    CACHES["transactions_shared"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": TRANSACTION_CACHE_REDIS_URL,
+    }
+
+TRANSACTION_HISTORY_CACHE = {
+    "TIERS": (
+        ["transactions_local", "transactions_shared"]
+        if TRANSACTION_CACHE_REDIS_URL
+        else ["transactions_local"]
+    ),
+    # Time to live in seconds per grouping mode
+    "TTLS": {
+        "daily": int(os.getenv("TRANSACTION_HISTORY_CACHE_TTL_DAILY", "60")),
+        "weekly": int(os.getenv("TRANSACTION_HISTORY_CACHE_TTL_WEEKLY", "300")),
+        "monthly": int(os.getenv("TRANSACTION_HISTORY_CACHE_TTL_MONTHLY", "900")),
+    },
+    # The generation and hit counters are shared through Redis when a URL is set;
+    # without it the cache can neither be invalidated nor inspected, and entries only
+    # expire with their time to live. Processes read the generation again after
+    # GENERATION_TTL seconds, so an invalidation takes up to that long to reach them
+    "GENERATION_TIER": "transactions_shared" if TRANSACTION_CACHE_REDIS_URL else None,
+    "GENERATION_TTL": float(
+        os.getenv("TRANSACTION_HISTORY_CACHE_GENERATION_TTL", "1.0")
+    ),
+    # Concurrent misses are coalesced per process, and across processes through a
+    # Redis lock when a URL is set
+    "SINGLE_FLIGHT_REDIS_URL": TRANSACTION_CACHE_REDIS_URL,
+    # Seconds a process waits for another one's aggregation before running its own
+    "SINGLE_FLIGHT_TIMEOUT": int(
+        os.getenv("TRANSACTION_HISTORY_SINGLE_FLIGHT_TIMEOUT", "30")
+    ),
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -137,6 +212,60 @@ if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
 log_filename = datetime.now().strftime("request_log_%Y-%m-%d.log")
+slow_command_log_filename = datetime.now().strftime("slow_commands_%Y-%m-%d.log")
+
+# Request log records are queued and written in batches by a background thread; when
+# the queue is full they are dropped, or with the "block" policy the request waits up
+# to REQUEST_LOG_BLOCK_TIMEOUT seconds for room first
+REQUEST_LOG_QUEUE_SIZE = int(os.getenv("REQUEST_LOG_QUEUE_SIZE", "10000"))
+REQUEST_LOG_BATCH_SIZE = int(os.getenv("REQUEST_LOG_BATCH_SIZE", "100"))
+REQUEST_LOG_FULL_POLICY = os.getenv("REQUEST_LOG_FULL_POLICY", "drop")
+REQUEST_LOG_BLOCK_TIMEOUT = float(os.getenv("REQUEST_LOG_BLOCK_TIMEOUT", "1.0"))
+
+# How much of the request and response bodies is logged: "off", "truncated" to their
+# first REQUEST_LOG_BODY_MAX_BYTES bytes, or "sampled" whole for a
+# REQUEST_LOG_BODY_SAMPLE_RATE fraction of the requests. Bodies are logged as raw text,
+# never parsed, with their size and SHA-256 hash
+REQUEST_LOG_BODY_CAPTURE = {
+    "mode": os.getenv("REQUEST_LOG_BODY_CAPTURE", "truncated"),
+    "max_bytes": int(os.getenv("REQUEST_LOG_BODY_MAX_BYTES", "4096")),
+    "sample_rate": float(os.getenv("REQUEST_LOG_BODY_SAMPLE_RATE", "0.01")),
+    "hash": True,
+}
+
+# Overrides of the body capture for requests matching a path prefix and, optionally,
+# methods; the first matching rule applies
+REQUEST_LOG_BODY_CAPTURE_RULES = [
+    # The stats endpoints return large bodies that are cheaper to recompute than to log
+    {
+        "path": "/api/transactions/",
+        "methods": ["GET"],
+        "mode": "off",
+        "hash": False,
+    },
+]
+
+# Request metrics, served by /metrics in the Prometheus text format. Every process
+# writes its samples to a file in METRICS_DIR every METRICS_FLUSH_INTERVAL seconds and
+# /metrics sums them; the files of exited processes are removed
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "zibal_metrics")
+)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0"))
+# /metrics only answers clients from METRICS_ALLOWED_NETWORKS (comma separated CIDR
+# blocks, compared with REMOTE_ADDR) or sending "Authorization: Bearer METRICS_TOKEN"
+METRICS_ALLOWED_NETWORKS = os.getenv(
+    "METRICS_ALLOWED_NETWORKS", "127.0.0.0/8,::1/128"
+).split(",")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# The upper bounds of the request latency buckets, in seconds
+METRICS_LATENCY_BUCKETS = [
+    float(bound)
+    for bound in os.getenv(
+        "METRICS_LATENCY_BUCKETS",
+        "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10",
+    ).split(",")
+]
 
 LOGGING = {
     "version": 1,
@@ -150,11 +279,23 @@ LOGGING = {
     "handlers": {
         "request_file": {
             "level": "INFO",
-            "class": "logging.handlers.TimedRotatingFileHandler",
+            "class": "zibal.logging_handlers.QueueFileHandler",
             "filename": os.path.join(LOG_DIR, log_filename),
             "when": "midnight",
             "formatter": "verbose",
             "backupCount": 7,  # Keeps logs for the last 7 days
+            "max_queue_size": REQUEST_LOG_QUEUE_SIZE,
+            "batch_size": REQUEST_LOG_BATCH_SIZE,
+            "full_policy": REQUEST_LOG_FULL_POLICY,
+            "block_timeout": REQUEST_LOG_BLOCK_TIMEOUT,
+        },
+        "slow_command_file": {
+            "level": "WARNING",
+            "class": "zibal.logging_handlers.QueueFileHandler",
+            "filename": os.path.join(LOG_DIR, slow_command_log_filename),
+            "when": "midnight",
+            "formatter": "verbose",
+            "backupCount": 7,
         },
     },
     "loggers": {
@@ -163,6 +304,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,  # Prevent log entries from being passed to the parent logger
         },
+        "slow_command_logger": {  # Commands over MONGO_SLOW_COMMAND_MS
+            "handlers": ["slow_command_file"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
@@ -188,3 +334,36 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(hour=0, minute=0),
     },
 }
+
+# Transaction summaries
+# Live tails older than this are not aggregated by the hybrid summary read path
+TRANSACTION_SUMMARY_LIVE_MAX_LAG = timedelta(
+    hours=int(os.getenv("TRANSACTION_SUMMARY_LIVE_MAX_LAG_HOURS", "6"))
+)
+
+# Largest page the transaction stats endpoints return for the limit parameter
+TRANSACTION_STATS_MAX_PAGE_SIZE = int(
+    os.getenv("TRANSACTION_STATS_MAX_PAGE_SIZE", "1000")
+)
+
+# Largest number of merchants a batch request to the transaction stats endpoints may ask for
+TRANSACTION_STATS_MAX_BATCH_SIZE = int(
+    os.getenv("TRANSACTION_STATS_MAX_BATCH_SIZE", "500")
+)
+
+# First and last Gregorian years covered by the precomputed Jalali calendar index
+JALALI_CALENDAR_INDEX_YEARS = (
+    int(os.getenv("JALALI_CALENDAR_INDEX_FIRST_YEAR", "2000")),
+    int(os.getenv("JALALI_CALENDAR_INDEX_LAST_YEAR", "2060")),
+)
+
+# Time zone whose midnights start the buckets of the Jalali calendar
+JALALI_CALENDAR_TIME_ZONE = os.getenv("JALALI_CALENDAR_TIME_ZONE", "Asia/Tehran")
+
+# JSON backend of the transaction stats endpoints: "auto" uses orjson when it is installed
+TRANSACTION_STATS_JSON_BACKEND = os.getenv("TRANSACTION_STATS_JSON_BACKEND", "auto")
+
+# Number of buckets read per cursor batch by the streamed transaction history
+TRANSACTION_HISTORY_STREAM_BATCH_SIZE = int(
+    os.getenv("TRANSACTION_HISTORY_STREAM_BATCH_SIZE", "500")
+)
@@ -17,8 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from zibal.views import metrics
+
 api_urlpatterns = [
     path("transactions/", include("transactions.urls")),
 ]
 
-urlpatterns = [path("admin/", admin.site.urls), path("api/", include(api_urlpatterns))]
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("api/", include(api_urlpatterns)),
+    path("metrics", metrics),
+]
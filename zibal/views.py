@@ -0,0 +1,43 @@
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from zibal.metrics import metrics_registry
+
+# The networks allowed to read the metrics without a token
+METRICS_ALLOWED_NETWORKS = [
+    ipaddress.ip_network(network.strip())
+    for network in settings.METRICS_ALLOWED_NETWORKS
+    if network.strip()
+]
+
+
+def is_metrics_client(request):
+    """
+    Returns whether the request may read the metrics, see `METRICS_ALLOWED_NETWORKS`
+    and `METRICS_TOKEN`.
+    """
+    if settings.METRICS_TOKEN:
+        authorization = request.META.get("HTTP_AUTHORIZATION", "")
+        if hmac.compare_digest(
+            authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+        ):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
+
+
+def metrics(request):
+    """
+    Returns the request metrics of every worker process in the Prometheus text format.
+    """
+    if not is_metrics_client(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render(), content_type="text/plain; version=0.0.4"
+    )